@@ -0,0 +1,138 @@
+"""
+Benchmark `pycobertura diff --exit-code-only` against the full diff pipeline.
+
+Generates two versions of a project of many source files with their Cobertura
+reports, where the second version edits a few blocks of lines in every file,
+and times the `diff` command with the text and HTML formats and with
+`--exit-code-only`. The parsed reports are cached with `--cache-dir` so that
+the best of the timed runs leaves the XML parsing out. The "pass" scenario covers every edited line, so that all
+the files must be checked, while the "fail" scenario leaves an edited line
+uncovered in one file.
+
+Usage:
+
+    python benchmarks/bench_diff_exit_code.py [--files 40] [--lines 5000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from pycobertura.cli import diff
+
+
+def write_version(root, sources, statuses):
+    """
+    Write the source files `sources` (filename -> lines) and a Cobertura
+    report with the line statuses `statuses` (filename -> {lineno: hits})
+    under the directory `root`.
+    """
+    classes = []
+    for filename, lines in sources.items():
+        path = os.path.join(root, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.writelines(lines)
+        line_elements = "".join(
+            f'<line number="{lineno}" hits="{hits}"/>'
+            for lineno, hits in sorted(statuses[filename].items())
+        )
+        classes.append(
+            f'<class name="{filename}" filename="{filename}" line-rate="0" '
+            f'branch-rate="0"><methods/><lines>{line_elements}</lines></class>'
+        )
+
+    report = os.path.join(root, "coverage.xml")
+    with open(report, "w") as f:
+        f.write(
+            '<?xml version="1.0" ?><coverage branch-rate="0" line-rate="0" '
+            'version="1"><sources><source>.</source></sources><packages>'
+            '<package name="pkg" line-rate="0" branch-rate="0"><classes>'
+            f'{"".join(classes)}</classes></package></packages></coverage>'
+        )
+    return report
+
+
+def generate_project(root, files, lines, scenario, rng):
+    """
+    Write both versions of the project under `root` and return the paths of
+    their reports.
+    """
+    sources1, sources2, statuses1, statuses2 = {}, {}, {}, {}
+    for i in range(files):
+        filename = f"pkg/module_{i}.py"
+        source = [f"value_{n} = compute({rng.randrange(1000)})\n" for n in range(lines)]
+        statuses = {n: rng.choice((0, 1, 1)) for n in range(1, lines + 1)}
+        edited = list(source)
+        edited_statuses = dict(statuses)
+        for _ in range(5):
+            start = rng.randrange(lines - 10)
+            for n in range(start, start + 10):
+                edited[n] = edited[n].replace("compute(", "compute(1 + ")
+                edited_statuses[n + 1] = 1
+        sources1[filename], sources2[filename] = source, edited
+        statuses1[filename], statuses2[filename] = statuses, edited_statuses
+
+    if scenario == "fail":
+        filename = f"pkg/module_{files // 2}.py"
+        edited = sources2[filename]
+        lineno = next(
+            n for n, line in enumerate(edited, start=1) if "compute(1 + " in line
+        )
+        statuses2[filename][lineno] = 0
+        statuses1[filename][lineno] = 0  # keep the number of misses unchanged
+
+    report1 = write_version(os.path.join(root, "v1"), sources1, statuses1)
+    report2 = write_version(os.path.join(root, "v2"), sources2, statuses2)
+    return report1, report2
+
+
+def time_diff(args):
+    start = time.perf_counter()
+    try:
+        diff.main(args, standalone_mode=False)
+    except SystemExit as e:
+        exit_code = e.code
+    else:
+        exit_code = 0
+    return time.perf_counter() - start, exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best time")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    modes = {
+        "text": ["--format", "text"],
+        "html": ["--format", "html"],
+        "exit-code-only": ["--exit-code-only"],
+    }
+    print(f"{'scenario':>8}  {'mode':>14}  {'time':>8}  exit code")
+    with tempfile.TemporaryDirectory() as root:
+        for scenario in ("pass", "fail"):
+            scenario_root = os.path.join(root, scenario)
+            report1, report2 = generate_project(
+                scenario_root, args.files, args.lines, scenario, rng
+            )
+            output = os.path.join(scenario_root, "report.out")
+            cache_dir = os.path.join(scenario_root, "cache")
+            for mode, mode_args in modes.items():
+                elapsed, exit_code = min(
+                    time_diff(
+                        mode_args
+                        + ["--cache-dir", cache_dir, "--output", output]
+                        + [report1, report2]
+                    )
+                    for _ in range(args.repeat)
+                )
+                print(f"{scenario:>8}  {mode:>14}  {elapsed:7.3f}s  {exit_code}")
+
+
+if __name__ == "__main__":
+    main()
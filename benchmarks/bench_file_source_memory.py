@@ -0,0 +1,75 @@
+"""
+Benchmark the memory used by the file sources of a large project.
+
+Generates a project with `bench_diff_exit_code.generate_project()` and, with
+`tracemalloc`, measures the memory and the number of memory blocks held by
+`Cobertura.file_source()` for every file (as `HtmlReporter` keeps them until
+the report is rendered) and the peak while walking all their lines once. The
+growth of the peak resident memory of `HtmlReporter.generate()` is measured
+first, without `tracemalloc`.
+
+Usage:
+
+    python benchmarks/bench_file_source_memory.py [--files 40] [--lines 20000]
+"""
+
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from bench_diff_exit_code import generate_project
+from pycobertura import Cobertura
+from pycobertura.filesystem import DirectoryFileSystem
+from pycobertura.reporters import HtmlReporter
+
+
+def load(report):
+    return Cobertura(report, filesystem=DirectoryFileSystem(os.path.dirname(report)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--lines", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        _, report = generate_project(
+            root, args.files, args.lines, "pass", random.Random(42)
+        )
+
+        cobertura = load(report)
+        # ru_maxrss is in KiB on Linux
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        html_start = time.perf_counter()
+        HtmlReporter(cobertura).generate()
+        html_elapsed = time.perf_counter() - html_start
+        html_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        cobertura = load(report)
+        tracemalloc.start()
+        start = time.perf_counter()
+        sources = [cobertura.file_source(filename) for filename in cobertura.files()]
+        elapsed = time.perf_counter() - start
+        held = tracemalloc.take_snapshot().statistics("filename")
+        held_size = sum(stat.size for stat in held)
+        held_blocks = sum(stat.count for stat in held)
+        walked = sum(1 for file_source in sources for line in file_source)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del sources
+
+    print(f"lines: {walked}")
+    print(f"file_source() of all files: {elapsed:.2f}s")
+    print(f"held: {held_size / 2**20:.1f} MiB in {held_blocks} blocks")
+    print(f"peak while walking the lines: {peak / 2**20:.1f} MiB")
+    print(f"HtmlReporter.generate(): {html_elapsed:.2f}s")
+    print(f"HtmlReporter peak memory growth: {(html_peak - baseline) / 1024:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
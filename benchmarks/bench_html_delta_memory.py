@@ -0,0 +1,57 @@
+"""
+Benchmark the peak memory of the HTML delta report of two versions of a large
+project.
+
+Generates the two versions with `bench_diff_exit_code.generate_project()`: a
+few blocks of lines are edited in every file, so that the report only shows
+small hunks of large files. The reports are parsed first and the time and the
+growth of the peak resident memory of `HtmlReporterDelta.generate()` are
+printed.
+
+Usage:
+
+    python benchmarks/bench_html_delta_memory.py [--files 40] [--lines 20000]
+"""
+
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+
+from bench_diff_exit_code import generate_project
+from pycobertura import Cobertura
+from pycobertura.filesystem import DirectoryFileSystem
+from pycobertura.reporters import HtmlReporterDelta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--lines", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        report1, report2 = generate_project(
+            root, args.files, args.lines, "pass", random.Random(42)
+        )
+        cobertura1, cobertura2 = (
+            Cobertura(report, filesystem=DirectoryFileSystem(os.path.dirname(report)))
+            for report in (report1, report2)
+        )
+
+        # ru_maxrss is in KiB on Linux
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        output = HtmlReporterDelta(cobertura1, cobertura2).generate()
+        elapsed = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"time: {elapsed:.2f}s")
+    print(f"peak memory growth: {(peak - baseline) / 1024:.0f} MiB")
+    print(f"report size: {len(output)} characters")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark `pycobertura.utils.reconcile_lines` on large generated files.
+
+Compares the current implementation with the former `difflib.Differ` based
+one on files of increasing sizes where a few percent of the lines have been
+edited, inserted or removed, then on files without any unique line (so with
+no anchor for the patience diff) compared with a shuffled copy of them.
+
+Usage:
+
+    python benchmarks/bench_reconcile_lines.py [--sizes 1000,10000,30000]
+        [--no-anchor-sizes 1000,8000]
+"""
+
+import argparse
+import difflib
+import random
+import time
+
+from pycobertura.utils import reconcile_lines
+
+
+def reconcile_lines_difflib(lines1, lines2):
+    """The `difflib.Differ` implementation of `reconcile_lines` (< 4.2)."""
+    lineno_map = {}
+    lineno1_offset = 0
+    lineno2 = 1
+    for diffline in difflib.Differ().compare(lines1, lines2):
+        if diffline.startswith("? "):
+            continue
+        if diffline.startswith("  "):
+            lineno_map[lineno2 + lineno1_offset] = lineno2
+        elif diffline.startswith("+ "):
+            lineno1_offset -= 1
+        elif diffline.startswith("- "):
+            lineno1_offset += 1
+            continue
+        lineno2 += 1
+    return lineno_map
+
+
+def generate_source(size, rng):
+    """Return `size` lines looking like generated code, with many repeats."""
+    lines = []
+    for i in range(size):
+        kind = rng.random()
+        if kind < 0.2:
+            lines.append("\n")
+        elif kind < 0.3:
+            lines.append("    }\n")
+        elif kind < 0.4:
+            lines.append("        return None\n")
+        else:
+            lines.append(f"    value_{i % 5000} = compute({rng.randrange(1000)})\n")
+    return lines
+
+
+def generate_source_without_anchors(size, rng):
+    """
+    Return `size` lines where each line occurs 4 times, in random order, so
+    that no line is unique.
+    """
+    lines = [f"    value_{i} = compute({i % 7})\n" for i in range(size // 4)] * 4
+    rng.shuffle(lines)
+    return lines
+
+
+def edit_source(lines, ratio, rng, max_block=40):
+    """
+    Return a copy of `lines` where blocks of up to `max_block` lines, about
+    `ratio` of the lines overall, were inserted, removed or rewritten.
+    """
+    edited = list(lines)
+    budget = int(len(lines) * ratio)
+    while budget > 0:
+        block = min(rng.randint(1, max_block), budget)
+        budget -= block
+        position = rng.randrange(len(edited))
+        operation = rng.random()
+        if operation < 0.3:
+            new_lines = [f"    added({rng.randrange(1000)})\n" for _ in range(block)]
+            edited[position:position] = new_lines
+        elif operation < 0.5:
+            del edited[position : position + block]
+        else:
+            # Rewritten lines stay similar to the original ones, the way
+            # regenerated code does, which is the worst case for difflib.Differ
+            edited[position : position + block] = [
+                line.replace("compute(", "compute(1 + ")
+                for line in edited[position : position + block]
+            ]
+    return edited
+
+
+def timeit(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,5000,10000,30000")
+    parser.add_argument("--edit-ratio", type=float, default=0.05)
+    parser.add_argument("--no-anchor-sizes", default="1000,2000,8000")
+    parser.add_argument(
+        "--skip-difflib-above",
+        type=int,
+        default=10000,
+        help="do not run the difflib implementation on larger files (too slow)",
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'lines':>8}  {'reconcile_lines':>16}  {'difflib.Differ':>16}  matched")
+    for size in map(int, args.sizes.split(",")):
+        lines1 = generate_source(size, rng)
+        lines2 = edit_source(lines1, args.edit_ratio, rng)
+
+        elapsed, lineno_map = timeit(reconcile_lines, lines1, lines2)
+        if size <= args.skip_difflib_above:
+            elapsed_difflib, _ = timeit(reconcile_lines_difflib, lines1, lines2)
+            difflib_column = f"{elapsed_difflib:15.3f}s"
+        else:
+            difflib_column = f"{'skipped':>16}"
+        print(f"{size:>8}  {elapsed:15.3f}s  {difflib_column}  {len(lineno_map)}")
+
+    print("\nwithout unique lines, shuffled:")
+    for size in map(int, args.no_anchor_sizes.split(",")):
+        lines1 = generate_source_without_anchors(size, rng)
+        lines2 = list(lines1)
+        rng.shuffle(lines2)
+
+        elapsed, lineno_map = timeit(reconcile_lines, lines1, lines2)
+        if size <= args.skip_difflib_above:
+            elapsed_difflib, _ = timeit(reconcile_lines_difflib, lines1, lines2)
+            difflib_column = f"{elapsed_difflib:15.3f}s"
+        else:
+            difflib_column = f"{'skipped':>16}"
+        print(f"{size:>8}  {elapsed:15.3f}s  {difflib_column}  {len(lineno_map)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark `pycobertura show --format text` on large files with sparse
+coverage data, where extrapolating the line statuses and formatting the
+Missing column dominate.
+
+Generates a report of files of many lines where only some of the lines are
+statements, in runs of hit and missed lines, and times the `show` command
+with and without NumPy (the pure Python fallback).
+
+Usage:
+
+    python benchmarks/bench_show_missing.py [--files 20] [--lines 100000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from pycobertura import utils
+from pycobertura.cli import show
+
+
+def write_report(path, files, lines, rng):
+    classes = []
+    for i in range(files):
+        filename = f"pkg/module_{i}.py"
+        line_elements = []
+        hits = 1
+        for lineno in range(1, lines + 1):
+            if rng.random() < 0.02:
+                hits = 1 - hits
+            if rng.random() < 0.4:
+                line_elements.append(f'<line number="{lineno}" hits="{hits}"/>')
+        classes.append(
+            f'<class name="{filename}" filename="{filename}" line-rate="0" '
+            f'branch-rate="0"><methods/><lines>{"".join(line_elements)}</lines>'
+            "</class>"
+        )
+    with open(path, "w") as f:
+        f.write(
+            '<?xml version="1.0" ?><coverage branch-rate="0" line-rate="0" '
+            'version="1"><sources><source>.</source></sources><packages>'
+            '<package name="pkg" line-rate="0" branch-rate="0"><classes>'
+            f'{"".join(classes)}</classes></package></packages></coverage>'
+        )
+
+
+def time_show(args):
+    start = time.perf_counter()
+    try:
+        show.main(args, standalone_mode=False)
+    except SystemExit:
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best time")
+    args = parser.parse_args()
+
+    numpy = utils._optional_module("np", "numpy")
+    with tempfile.TemporaryDirectory() as root:
+        report = os.path.join(root, "coverage.xml")
+        write_report(report, args.files, args.lines, random.Random(42))
+        show_args = [
+            "--format",
+            "text",
+            "--cache-dir",
+            os.path.join(root, "cache"),
+            "--output",
+            os.path.join(root, "report.txt"),
+            report,
+        ]
+        outputs = {}
+        for name, module in (("python", None), ("numpy", numpy)):
+            if name == "numpy" and numpy is None:
+                print("numpy: not installed")
+                continue
+            utils.np = module
+            elapsed = min(time_show(show_args) for _ in range(args.repeat))
+            with open(show_args[-2]) as f:
+                outputs[name] = f.read()
+            print(f"{name}: {elapsed:.3f}s")
+        utils.np = numpy
+
+    if len(outputs) == 2:
+        print("same output:", outputs["python"] == outputs["numpy"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark the startup of the `pycobertura` CLI with `python -X importtime`.
+
+Runs `pycobertura show` on a small report for every output format in a new
+interpreter with `-X importtime`, and prints the best wall time, the
+cumulative import time of `pycobertura` and of its modules, and which of the
+heavy optional dependencies (jinja2, tabulate, ruamel.yaml, numpy, ...) were
+imported for the format.
+
+Usage:
+
+    python benchmarks/bench_startup.py [--repeat 5] [--formats text,html]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = (
+    "jinja2",
+    "tabulate",
+    "ruamel.yaml",
+    "numpy",
+    "zstandard",
+    "concurrent.futures.process",
+)
+
+REPORT = """<?xml version="1.0" ?>
+<coverage branch-rate="0" line-rate="0.5" version="1">
+<sources><source>.</source></sources>
+<packages><package name="pkg" line-rate="0.5" branch-rate="0"><classes>
+<class name="module" filename="module.py" line-rate="0.5" branch-rate="0">
+<methods/><lines><line number="1" hits="1"/><line number="2" hits="0"/></lines>
+</class>
+</classes></package></packages>
+</coverage>
+"""
+
+_IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def run(args):
+    """
+    Run `python -X importtime -m pycobertura <args>` and return the tuple
+    `(wall time, {module: cumulative import time in seconds})` of the
+    top-level imports.
+    """
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "pycobertura"] + args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    imports = {}
+    for match in _IMPORT_TIME.finditer(process.stderr):
+        _, cumulative, _, module = match.groups()
+        imports[module] = int(cumulative) / 1e6
+    return elapsed, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="keep the best time")
+    parser.add_argument(
+        "--formats", default="text,csv,markdown,json,yaml,html,github-annotation"
+    )
+    args = parser.parse_args()
+
+    print(f"{'format':>18}  {'wall':>8}  {'pycobertura':>11}  heavy imports")
+    with tempfile.TemporaryDirectory() as root:
+        report = os.path.join(root, "coverage.xml")
+        with open(report, "w") as f:
+            f.write(REPORT)
+        with open(os.path.join(root, "module.py"), "w") as f:
+            f.write("a = 1\nb = 2\n")
+        output = os.path.join(root, "report.out")
+
+        for format in args.formats.split(","):
+            runs = [
+                run(["show", "--format", format, "--output", output, report])
+                for _ in range(args.repeat)
+            ]
+            elapsed = min(elapsed for elapsed, _ in runs)
+            _, imports = min(runs, key=lambda run: run[1].get("pycobertura", 0))
+            heavy = [module for module in HEAVY_MODULES if module in imports]
+            print(
+                f"{format:>18}  {elapsed:7.3f}s  "
+                f"{imports.get('pycobertura', 0):10.3f}s  {', '.join(heavy) or '-'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,2 @@
-from .cobertura import Cobertura, CoberturaDiff  # noqa
+from .cobertura import Cobertura, CoberturaDiff, load_many  # noqa
 from .reporters import TextReporter, TextReporterDelta  # noqa
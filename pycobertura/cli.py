@@ -1,21 +1,13 @@
+from collections.abc import Mapping
+from importlib import import_module
+
 import click
 
-from pycobertura.cobertura import Cobertura, CoberturaDiff
-from pycobertura.reporters import (
-    GitHubAnnotationReporter,
-    HtmlReporter,
-    TextReporter,
-    CsvReporter,
-    MarkdownReporter,
-    JsonReporter,
-    YamlReporter,
-    HtmlReporterDelta,
-    TextReporterDelta,
-    CsvReporterDelta,
-    MarkdownReporterDelta,
-    JsonReporterDelta,
-    YamlReporterDelta,
-    GitHubAnnotationReporterDelta,
+from pycobertura.cobertura import (
+    DEFAULT_CACHE_LINES,
+    Cobertura,
+    CoberturaDiff,
+    total_misses_exceed,
 )
 from pycobertura.filesystem import filesystem_factory
 from pycobertura.utils import get_dir_from_file_path
@@ -23,15 +15,37 @@ from pycobertura.utils import get_dir_from_file_path
 pycobertura = click.Group()
 
 
-reporters = {
-    "html": HtmlReporter,
-    "text": TextReporter,
-    "csv": CsvReporter,
-    "markdown": MarkdownReporter,
-    "json": JsonReporter,
-    "yaml": YamlReporter,
-    "github-annotation": GitHubAnnotationReporter,
-}
+class LazyReporters(Mapping):
+    """
+    Mapping of the format names to the reporter classes of
+    `pycobertura.reporters`, given by their class name and looked up on
+    access, so that only the reporter of the requested format is loaded.
+    """
+
+    def __init__(self, class_names):
+        self.class_names = class_names
+
+    def __getitem__(self, name):
+        return getattr(import_module("pycobertura.reporters"), self.class_names[name])
+
+    def __iter__(self):
+        return iter(self.class_names)
+
+    def __len__(self):
+        return len(self.class_names)
+
+
+reporters = LazyReporters(
+    {
+        "html": "HtmlReporter",
+        "text": "TextReporter",
+        "csv": "CsvReporter",
+        "markdown": "MarkdownReporter",
+        "json": "JsonReporter",
+        "yaml": "YamlReporter",
+        "github-annotation": "GitHubAnnotationReporter",
+    }
+)
 
 
 class ExitCodes:
@@ -129,6 +143,24 @@ def get_exit_code(differ: CoberturaDiff, source):
     help="Return a non-zero code if the total number of uncovered statements "
     "exceeds the threshold.",
 )
+@click.option(
+    "--cache-dir",
+    metavar="<dir>",
+    type=click.Path(file_okay=False),
+    help="Save the parsed coverage reports as binary snapshots in <dir> and "
+    "load them from there instead of parsing the XML again, as long as the "
+    "reports are unchanged.",
+)
+@click.option(
+    "--exit-code-only",
+    is_flag=True,
+    default=False,
+    help="Do not generate the report, only check the total number of uncovered "
+    "statements against --fail-threshold and return the exit code. The check "
+    "stops reading the report as soon as the threshold is exceeded, and trusts "
+    "the lines-valid and lines-covered attributes of the report when they show "
+    "that it is.",
+)
 def show(
     cobertura_file,
     ignore_regex,
@@ -142,15 +174,26 @@ def show(
     annotation_title,
     annotation_message,
     fail_threshold,
+    cache_dir,
+    exit_code_only,
 ):
     """show coverage summary of a Cobertura report"""
 
+    if exit_code_only:
+        if fail_threshold is None:
+            raise click.UsageError("--exit-code-only requires --fail-threshold.")
+        if total_misses_exceed(cobertura_file, fail_threshold):
+            raise SystemExit(ExitCodes.TOTAL_MISSES_ABOVE_THRESHOLD)
+        return
+
     if not source:
         source = get_dir_from_file_path(cobertura_file)
 
     cobertura = Cobertura(
         cobertura_file,
         filesystem=filesystem_factory(source, source_prefix=source_prefix),
+        streaming=True,
+        cache_dir=cache_dir,
     )
     Reporter = reporters[format]
     reporter_kwargs = {}
@@ -179,15 +222,32 @@ def show(
             raise SystemExit(ExitCodes.TOTAL_MISSES_ABOVE_THRESHOLD)
 
 
-delta_reporters = {
-    "text": TextReporterDelta,
-    "csv": CsvReporterDelta,
-    "markdown": MarkdownReporterDelta,
-    "html": HtmlReporterDelta,
-    "json": JsonReporterDelta,
-    "yaml": YamlReporterDelta,
-    "github-annotation": GitHubAnnotationReporterDelta,
-}
+@pycobertura.command()
+@click.argument("cobertura_files", nargs=-1, required=True)
+@click.option(
+    "-o",
+    "--output",
+    metavar="<file>",
+    type=click.File("wb"),
+    default="-",
+    help="Write the merged report to <file> instead of stdout.",
+)
+def merge(cobertura_files, output):
+    """merge Cobertura reports into one"""
+    Cobertura.merge(cobertura_files, output)
+
+
+delta_reporters = LazyReporters(
+    {
+        "text": "TextReporterDelta",
+        "csv": "CsvReporterDelta",
+        "markdown": "MarkdownReporterDelta",
+        "html": "HtmlReporterDelta",
+        "json": "JsonReporterDelta",
+        "yaml": "YamlReporterDelta",
+        "github-annotation": "GitHubAnnotationReporterDelta",
+    }
+)
 
 
 @pycobertura.command(help="""\
@@ -290,6 +350,41 @@ directories (or zip archives). If the source is not available at all, pass
     type=str,
     help="annotation message for github annotation format",
 )
+@click.option(
+    "--cache-dir",
+    metavar="<dir>",
+    type=click.Path(file_okay=False),
+    help="Save the parsed coverage reports as binary snapshots in <dir> and "
+    "load them from there instead of parsing the XML again, as long as the "
+    "reports are unchanged.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    metavar="<n>",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Diff the source of <n> files in parallel. Useful for large reports "
+    "when the source is shown.",
+)
+@click.option(
+    "--cache-lines",
+    metavar="<lines>",
+    default=DEFAULT_CACHE_LINES,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Keep the diffed source of the files in memory, up to <lines> lines "
+    "(about 300 bytes per line), so that it is computed once per file. Pass 0 "
+    "to disable the cache and save memory.",
+)
+@click.option(
+    "--exit-code-only",
+    is_flag=True,
+    default=False,
+    help="Do not generate the report, only compute and return the exit code. "
+    "This is much faster when only the exit code is needed, e.g. to gate a "
+    "CI pipeline.",
+)
 def diff(
     cobertura_file1,
     cobertura_file2,
@@ -306,6 +401,10 @@ def diff(
     annotation_level,
     annotation_title,
     annotation_message,
+    cache_dir,
+    jobs,
+    cache_lines,
+    exit_code_only,
 ):
     """compare coverage of two Cobertura reports"""
     # Assume that the source is located in the same directory as the provided
@@ -317,14 +416,29 @@ def diff(
         source2 = get_dir_from_file_path(cobertura_file2)
 
     filesystem1 = filesystem_factory(source1, source_prefix=source_prefix1)
-    cobertura1 = Cobertura(cobertura_file1, filesystem=filesystem1)
+    cobertura1 = Cobertura(
+        cobertura_file1, filesystem=filesystem1, streaming=True, cache_dir=cache_dir
+    )
 
     filesystem2 = filesystem_factory(source2, source_prefix=source_prefix2)
-    cobertura2 = Cobertura(cobertura_file2, filesystem=filesystem2)
+    cobertura2 = Cobertura(
+        cobertura_file2, filesystem=filesystem2, streaming=True, cache_dir=cache_dir
+    )
+
+    if exit_code_only:
+        with CoberturaDiff(
+            cobertura1, cobertura2, jobs=jobs, cache_lines=cache_lines
+        ) as differ:
+            exit_code = get_exit_code(differ, source)
+        raise SystemExit(exit_code)
 
     Reporter = delta_reporters[format]
     reporter_args = [cobertura1, cobertura2, ignore_regex]
-    reporter_kwargs = {"show_source": source}
+    reporter_kwargs = {
+        "show_source": source,
+        "jobs": jobs,
+        "cache_lines": cache_lines,
+    }
 
     isatty = True if output is None else output.isatty()
 
@@ -333,21 +447,22 @@ def diff(
         reporter_kwargs["color"] = color
 
     reporter = Reporter(*reporter_args, **reporter_kwargs)
-    if format == "csv":
-        report = reporter.generate(delimiter)
-    elif format == "github-annotation":
-        report = reporter.generate(
-            annotation_level=annotation_level,
-            annotation_message=annotation_message,
-            annotation_title=annotation_title,
-        )
-    else:
-        report = reporter.generate()
+    with reporter.differ:
+        if format == "csv":
+            report = reporter.generate(delimiter)
+        elif format == "github-annotation":
+            report = reporter.generate(
+                annotation_level=annotation_level,
+                annotation_message=annotation_message,
+                annotation_title=annotation_title,
+            )
+        else:
+            report = reporter.generate()
 
-    if not isinstance(report, bytes):
-        report = report.encode("utf-8")
+        if not isinstance(report, bytes):
+            report = report.encode("utf-8")
 
-    click.echo(report, file=output, nl=isatty, color=color)
+        click.echo(report, file=output, nl=isatty, color=color)
 
-    exit_code = get_exit_code(reporter.differ, source)
+        exit_code = get_exit_code(reporter.differ, source)
     raise SystemExit(exit_code)
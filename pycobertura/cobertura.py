@@ -1,14 +1,31 @@
+import io
+import os
+import re
 import lxml.etree as ET
-from collections import namedtuple
+from array import array
+from collections import deque, namedtuple
+from collections.abc import Sequence
+from concurrent import futures  # the executors are imported on first use
+from itertools import compress, count
+from operator import not_
+from pycobertura.merge import merge_reports
+from pycobertura.snapshot import ReportSnapshot
 from pycobertura.utils import (
+    GZIP_MAGIC,
+    ZSTD_MAGIC,
+    LINE_STATUS_CODES,
+    LINE_STATUSES,
     LineStatus,
     LineStatusTuple,
-    extrapolate_coverage,
+    extrapolate_missed_lines,
+    extrapolate_missed_ranges,
     get_line_status,
     reconcile_lines,
     hunkify_lines,
-    get_filenames_that_do_not_match_regex,
+    compile_ignore_filter,
     memoize,
+    LRUCache,
+    open_report,
 )
 
 from typing import Dict, List, Tuple
@@ -19,6 +36,18 @@ except ImportError:  # pragma: no cover
     from typing_extensions import Literal
 
 
+# Default number of diffed source lines cached by `CoberturaDiff`.
+DEFAULT_CACHE_LINES = 1000000
+
+# Estimated bytes of source kept by `Cobertura.file_source()` and by
+# `Cobertura.source_lines()`, each.
+SOURCE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Estimated overhead of a cached source line on top of its text: the string
+# object, the `Line` tuple and the list slot.
+_SOURCE_LINE_OVERHEAD = 128
+
+
 class Line(namedtuple("Line", ["number", "source", "status", "reason"])):
     """
     A namedtuple object representing a line of source code.
@@ -32,6 +61,244 @@ class Line(namedtuple("Line", ["number", "source", "status", "reason"])):
         `"line-edit"`, `"cov-up"` or `"cov-down"`. Otherwise `None`.
     """
 
+    __slots__ = ()
+
+
+# The statuses and the reasons of the lines of a `FileSource` are stored as
+# their index in these tuples, 0 standing for `None`.
+_STATUSES = (None,) + LINE_STATUSES
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+_REASONS = (None, "line-edit", "cov-up", "cov-down")
+_REASON_CODES = {reason: code for code, reason in enumerate(_REASONS)}
+
+# Runs of lines with a status or a reason in a column of codes.
+_CODED_RUNS = re.compile(b"[^\x00]+")
+
+
+class FileSource(Sequence):
+    """
+    The sequence of the `Line` of a source file, stored as a table of columns
+    from which the `Line` objects are created on demand.
+
+    `source_lines` is the sequence of the source lines of the file (see
+    `pycobertura.filesystem.SourceLines`), `statuses` and `reasons` are
+    `bytearray` columns of one byte per line: the code of the status and of
+    the reason of the line (see `_STATUSES` and `_REASONS`). Only the lines
+    that are accessed are decoded and turned into `Line` objects: a reporter
+    that walks the hunks of a diff never builds the other lines.
+    """
+
+    __slots__ = ("source_lines", "statuses", "reasons")
+
+    def __init__(self, source_lines, statuses=None, reasons=None):
+        self.source_lines = source_lines
+        size = len(source_lines)
+        self.statuses = bytearray(size) if statuses is None else statuses
+        self.reasons = bytearray(size) if reasons is None else reasons
+
+    @classmethod
+    def from_line_statuses(cls, source_lines, line_statuses):
+        """
+        Return the `FileSource` of `source_lines` with the statuses of the
+        tuples `(lineno, status)` of `line_statuses` and no reasons. Line
+        numbers past the end of the source are ignored.
+        """
+        file_source = cls(source_lines)
+        statuses = file_source.statuses
+        for lineno, status in line_statuses:
+            if 0 < lineno <= len(statuses):
+                statuses[lineno - 1] = _STATUS_CODES[status]
+        return file_source
+
+    def __len__(self):
+        return len(self.source_lines)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("file source index out of range")
+        return Line(
+            index + 1,
+            self.source_lines[index],
+            _STATUSES[self.statuses[index]],
+            _REASONS[self.reasons[index]],
+        )
+
+    def __iter__(self):
+        return map(
+            Line,
+            count(1),
+            self.source_lines,
+            map(_STATUSES.__getitem__, self.statuses),
+            map(_REASONS.__getitem__, self.reasons),
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None
+
+    def changed_lines(self):
+        """
+        Return the list of the `Line` that have a status or a reason, in
+        order, without building the other lines.
+        """
+        indexes = set(_coded_indexes(self.statuses))
+        indexes.update(_coded_indexes(self.reasons))
+        return [self[index] for index in sorted(indexes)]
+
+    @property
+    def nbytes(self):
+        """
+        An estimate of the number of bytes held by the file source.
+        """
+        size = getattr(self.source_lines, "nbytes", None)
+        if size is None:
+            size = _source_size(self.source_lines)
+        return size + len(self.statuses) + len(self.reasons)
+
+
+def _coded_indexes(codes):
+    for run in _CODED_RUNS.finditer(codes):
+        yield from range(run.start(), run.end())
+
+
+class _FileLines:
+    """
+    Columnar store of the lines found in a Cobertura report for one file.
+
+    `numbers` and `statuses` are parallel arrays of the line numbers and of
+    the line status codes (see `pycobertura.utils.LINE_STATUS_CODES`) in the
+    order in which they appear in the report. The number of lines of each
+    status is counted once, when the lines are added.
+    """
+
+    __slots__ = ("numbers", "statuses", "hits", "misses", "partials", "class_rates")
+
+    def __init__(self):
+        self.numbers = array("I")
+        self.statuses = array("B")
+        self.hits = 0
+        self.misses = 0
+        self.partials = 0
+        # `(line-rate, branch-rate)` attributes of each class of the file
+        self.class_rates: List[Tuple[str, str]] = []
+
+    @property
+    def total_misses(self):
+        return self.misses + self.partials
+
+    def add_class(self, class_element):
+        """
+        Append the lines of the `<class>` element `class_element`.
+        """
+        numbers = self.numbers
+        statuses = array("B")
+        for line in class_element.iterfind("lines/line"):
+            numbers.append(int(line.get("number")))
+            statuses.append(LINE_STATUS_CODES[get_line_status(line)])
+
+        self.statuses.extend(statuses)
+        self.hits += statuses.count(LINE_STATUS_CODES["hit"])
+        self.misses += statuses.count(LINE_STATUS_CODES["miss"])
+        self.partials += statuses.count(LINE_STATUS_CODES["partial"])
+        self.class_rates.append(
+            (class_element.get("line-rate"), class_element.get("branch-rate"))
+        )
+
+    def get_state(self):
+        """
+        Return the content of the store as a tuple of plain, marshallable,
+        values. See `_FileLines.from_state`.
+        """
+        return (
+            self.numbers.tobytes(),
+            self.statuses.tobytes(),
+            self.hits,
+            self.misses,
+            self.partials,
+            self.class_rates,
+        )
+
+    @classmethod
+    def from_state(cls, state):
+        numbers, statuses, hits, misses, partials, class_rates = state
+        file_lines = cls()
+        file_lines.numbers.frombytes(numbers)
+        file_lines.statuses.frombytes(statuses)
+        file_lines.hits = hits
+        file_lines.misses = misses
+        file_lines.partials = partials
+        file_lines.class_rates = class_rates
+        return file_lines
+
+
+_Totals = namedtuple("_Totals", ["statements", "hits", "misses"])
+
+
+def _sum_totals(files_lines):
+    """
+    Return the `_Totals` of the `_FileLines` objects of `files_lines`.
+    """
+    statements = hits = misses = 0
+    for file_lines in files_lines:
+        statements += len(file_lines.numbers)
+        hits += file_lines.hits
+        misses += file_lines.total_misses
+    return _Totals(statements, hits, misses)
+
+
+def _source_size(lines):
+    """
+    Estimate the memory used by `lines`, a sequence of source lines or of
+    `Line`.
+    """
+    nbytes = getattr(lines, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    size = _SOURCE_LINE_OVERHEAD * len(lines)
+    for line in lines:
+        size += len(line if isinstance(line, str) else line.source)
+    return size
+
+
+def _is_file_path(report):
+    return isinstance(report, (str, bytes, os.PathLike)) and os.path.isfile(report)
+
+
+_REPORT_KINDS = {
+    "path": "a filename",
+    "file": "a file object",
+    "string": "an XML Cobertura string",
+}
+
+
+def _report_kind(report):
+    """
+    Tell how to read the report `report` without attempting to parse it:
+    `"file"` for a file object, `"string"` for XML content (a string or bytes
+    starting with `<`, or gzip or zstd compressed bytes) and `"path"`
+    otherwise, including bytes and `os.PathLike` paths.
+    """
+    if hasattr(report, "read"):
+        return "file"
+    if isinstance(report, bytearray):
+        return "string"
+    if isinstance(report, bytes):
+        if report.startswith((GZIP_MAGIC, ZSTD_MAGIC)):
+            return "string"
+        if report.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<"):
+            return "string"
+        return "path"
+    if isinstance(report, str) and report.lstrip("\ufeff \t\r\n").startswith("<"):
+        return "string"
+    return "path"
+
 
 class Cobertura:
     """
@@ -44,7 +311,7 @@ class Cobertura:
     class MissingFileSystem(Exception):
         pass
 
-    def __init__(self, report, filesystem=None):
+    def __init__(self, report, filesystem=None, streaming=False, cache_dir=None):
         """
         Initialize a Cobertura report given a coverage report `report` that is
         an XML file in the Cobertura format. It can represented as either:
@@ -53,67 +320,181 @@ class Cobertura:
             - a file path
             - an XML string
 
+        File reports may be compressed with gzip or zstd (see
+        `pycobertura.utils.open_report`), they are decompressed as they are
+        parsed.
+
         The optional keyword argument `filesystem` describes how to retrieve the
         source files referenced in the report. Please check the
         `pycobertura.filesystem` module to learn more about filesystems.
+
+        If `streaming` is `True`, the report is read incrementally with
+        `lxml.etree.iterparse`: only the per-file line data is kept and the XML
+        elements are discarded as soon as they have been read. This keeps the
+        memory usage low on very large reports, but `Cobertura.xml` is then
+        `None`.
+
+        If `cache_dir` is given and `report` is a file path, the parsed report
+        is saved as a binary snapshot in the `cache_dir` directory (which may
+        be the directory of the report itself). As long as the report does not
+        change, the snapshot is loaded instead of parsing the XML again, in
+        which case `Cobertura.xml` is `None`. See `pycobertura.snapshot`.
         """
-        errors = []
-        for load_func in [
-            self._load_from_file,
-            self._load_from_string,
-        ]:
-            try:
-                self.xml: ET._Element = load_func(report)
-                break
-            except BaseException as e:
-                errors.append(e)
-                pass
-        else:
+        self.streaming = streaming
+        self.filesystem = filesystem
+        self.report = report
+
+        snapshot = None
+        if cache_dir is not None and _is_file_path(report):
+            snapshot = ReportSnapshot(cache_dir, os.fsdecode(report))
+            state = snapshot.load()
+            if state is not None:
+                self.xml = None
+                self._set_state(state)
+                return
+
+        self._load(report)
+        if snapshot is not None:
+            snapshot.save(self._get_state())
+
+    def _load(self, report):
+        kind = _report_kind(report)
+        try:
+            if kind == "string":
+                self.xml: ET._Element = self._load_from_string(report)
+            else:
+                self.xml = self._load_from_file(report)
+        except Exception as e:
             raise self.InvalidCoverageReport(
                 """\
 Invalid coverage report: {}.
-The following exceptions occurred while attempting to parse the report:
-* While treating the report as a filename: {}.
-* While treating the report as an XML Cobertura string: {}""".format(
-                    report, errors[0], errors[1]
+The following exception occurred while parsing the report as {}: {}""".format(
+                    report, _REPORT_KINDS[kind], e
                 )
-            )
-
-        self.filesystem = filesystem
-        self.report = report
+            ) from e
 
-        self._class_elements_by_file_name = self._make_class_elements_by_filename()
+        if not self.streaming:
+            self._read_tree(self.xml)
 
-    def _make_class_elements_by_filename(self):
-        result = {}
-        for elem in self.xml.xpath("./packages//class"):
-            filename = elem.attrib["filename"]
-            result.setdefault(filename, []).append(elem)
-
-        return result
+    @staticmethod
+    def merge(reports, output):
+        """
+        Merge the Cobertura reports `reports`, an iterable of paths or file
+        objects, into one report written to `output`, a path or a binary file
+        object. The reports are streamed, see `pycobertura.merge`.
+        """
+        merge_reports(reports, output)
 
     def __eq__(self, other):
         return self.report and other.report and self.report == other.report
 
     def _load_from_file(self, report_file):
-        return ET.parse(report_file).getroot()
+        with open_report(report_file) as f:
+            if self.streaming:
+                self._parse_streaming(f)
+                return None
+            return ET.parse(f).getroot()
 
     def _load_from_string(self, s):
-        return ET.fromstring(s)
+        if isinstance(s, str):
+            if not self.streaming:
+                return ET.fromstring(s)
+            s = s.encode("utf-8")
+        # may be a compressed report
+        return self._load_from_file(io.BytesIO(s))
+
+    def _read_tree(self, root):
+        """
+        Fill the per-file line store from the already parsed XML tree `root`.
+        """
+        files: Dict[str, _FileLines] = {}
+        for elem in root.xpath("./packages//class"):
+            filename = elem.get("filename")
+            file_lines = files.get(filename)
+            if file_lines is None:
+                file_lines = files[filename] = _FileLines()
+            file_lines.add_class(elem)
+
+        packages = [el.get("name") for el in root.xpath("//package")]
+        self._set_store(dict(root.attrib), packages, files)
+
+    def _parse_streaming(self, source):
+        """
+        Read the report `source` one `<class>` element at a time and fill the
+        per-file line store. Every element is cleared once it has been read so
+        that the full tree is never built.
+        """
+        packages = []
+        files: Dict[str, _FileLines] = {}
 
-    @memoize
-    def _get_lines_by_filename(self, filename):
-        classElements = self._class_elements_by_file_name[filename]
-        return [
-            line
-            for classElement in classElements
-            for line in classElement.xpath("./lines/line")
-        ]
+        context = ET.iterparse(source, events=("end",), tag=("package", "class"))
+        for _, elem in context:
+            if elem.tag == "package":
+                packages.append(elem.get("name"))
+            else:
+                filename = elem.get("filename")
+                file_lines = files.get(filename)
+                if file_lines is None:
+                    file_lines = files[filename] = _FileLines()
+                file_lines.add_class(elem)
+
+            elem.clear()
+            # Drop the already processed siblings, they are empty by now but
+            # would otherwise pile up under their parent.
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+        self._set_store(dict(context.root.attrib), packages, files)
+
+    def _set_store(self, root_attrib, packages, files):
+        self._root_attrib = root_attrib
+        self._packages = packages
+        # `_files` and `_filenames` index the files of the report, by name and
+        # in the order in which they appear in the report.
+        self._files: Dict[str, _FileLines] = files
+        self._filenames = list(files)
+        self._report_totals = _sum_totals(files.values())
+
+    def _get_state(self):
+        """
+        Return the parsed content of the report as plain values that can be
+        marshalled, to be restored with `Cobertura._set_state`.
+        """
+        return (
+            self._root_attrib,
+            self._packages,
+            [
+                (filename, file_lines.get_state())
+                for filename, file_lines in self._files.items()
+            ],
+        )
+
+    @classmethod
+    def _from_state(cls, report, state, filesystem=None):
+        """
+        Return a `Cobertura` of the report `report` restored from the state
+        `state` returned by `Cobertura._get_state`, without parsing `report`.
+        """
+        cobertura = cls.__new__(cls)
+        cobertura.streaming = True
+        cobertura.filesystem = filesystem
+        cobertura.report = report
+        cobertura.xml = None
+        cobertura._set_state(state)
+        return cobertura
+
+    def _set_state(self, state):
+        root_attrib, packages, files_state = state
+        files = {
+            filename: _FileLines.from_state(file_state)
+            for filename, file_state in files_state
+        }
+        self._set_store(root_attrib, packages, files)
 
     @property
     def version(self):
         """Return the version number of the coverage report."""
-        return self.xml.get("version")
+        return self._root_attrib.get("version")
 
     def line_rate(self, filename=None, ignore_regex=None):
         """
@@ -122,12 +503,13 @@ The following exceptions occurred while attempting to parse the report:
         """
 
         if filename is None and ignore_regex is None:
-            return float(self.xml.get("line-rate"))
+            return float(self._root_attrib.get("line-rate"))
 
         if ignore_regex is None:
-            elements = self._class_elements_by_file_name[filename]
-            if len(elements) == 1:
-                return float(elements[0].get("line-rate"))
+            class_rates = self._files[filename].class_rates
+            if len(class_rates) == 1:
+                line_rate, _ = class_rates[0]
+                return float(line_rate)
         total = self.total_statements(filename, ignore_regex)
         return (
             float(self.total_hits(filename, ignore_regex) / total) if total != 0 else 0
@@ -140,69 +522,56 @@ The following exceptions occurred while attempting to parse the report:
         """
         branch_rate = None
         if filename is None:
-            branch_rate = self.xml.get("branch-rate")
+            branch_rate = self._root_attrib.get("branch-rate")
         else:
-            classElement = self._class_elements_by_file_name[filename][0]
-            branch_rate = classElement.get("branch-rate")
+            _, branch_rate = self._files[filename].class_rates[0]
         return None if branch_rate is None else float(branch_rate)
 
-    @memoize
     def missed_statements(self, filename):
         """
         Return a list of uncovered line numbers for each of the missed
         statements found for the file `filename`.
         """
-        classElements = self._class_elements_by_file_name[filename]
-        return [
-            int(line.get("number"))
-            for classElement in classElements
-            for line in classElement.xpath("./lines/line")
-            if get_line_status(line) != "hit"
-        ]
+        file_lines = self._files[filename]
+        # "hit" is status code 0, every other status is a miss.
+        return list(compress(file_lines.numbers, file_lines.statuses))
 
-    @memoize
     def hit_statements(self, filename):
         """
         Return a list of covered line numbers for each of the hit statements
         found for the file `filename`.
         """
-        classElements = self._class_elements_by_file_name[filename]
-        return [
-            int(line.get("number"))
-            for classElement in classElements
-            for line in classElement.xpath("./lines/line[@hits>0]")
-            if get_line_status(line) == "hit"
-        ]
+        file_lines = self._files[filename]
+        return list(compress(file_lines.numbers, map(not_, file_lines.statuses)))
 
-    def line_statuses(self, filename: str):
+    def line_statuses(self, filename: str) -> List[LineStatusTuple]:
         """
         Return a list of tuples `(lineno, status)` of all the lines found in
         the Cobertura report for the given file `filename` where `lineno` is
         the line number and `status` is coverage status of the line which can
         be either `True` (line hit) or `False` (line miss).
         """
-        line_elements = self._get_lines_by_filename(filename)
-
-        output: List[LineStatusTuple] = []
-        for line in line_elements:
-            lineno = int(line.get("number"))
-            status = get_line_status(line)
-            output.append((lineno, status))
-
-        return output
+        file_lines = self._files[filename]
+        return list(
+            zip(file_lines.numbers, map(LINE_STATUSES.__getitem__, file_lines.statuses))
+        )
 
     def missed_lines(self, filename):
         """
         Return a list of extrapolated uncovered or partially uncovered line
         numbers for the file `filename` according to `Cobertura.line_statuses`.
         """
-        statuses = self.line_statuses(filename)
-        extrapolated_statuses = extrapolate_coverage(statuses)
-        return [
-            (lineno, status)
-            for lineno, status in extrapolated_statuses
-            if (status == "miss" or status == "partial")
-        ]
+        file_lines = self._files[filename]
+        return extrapolate_missed_lines(file_lines.numbers, file_lines.statuses)
+
+    def missed_line_ranges(self, filename):
+        """
+        Return the list of tuples `(range_start, range_end, status)` of the
+        consecutive lines of `Cobertura.missed_lines` of the file `filename`
+        that have the same status.
+        """
+        file_lines = self._files[filename]
+        return extrapolate_missed_ranges(file_lines.numbers, file_lines.statuses)
 
     def _raise_MissingFileSystem(self, filename):
         raise self.MissingFileSystem(
@@ -212,28 +581,23 @@ The following exceptions occurred while attempting to parse the report:
             f"content of the file."
         )
 
-    @memoize
+    @memoize(maxbytes=SOURCE_CACHE_BYTES, sizeof=_source_size)
     def file_source(self, filename):
         """
-        Return a list of namedtuple `Line` for each line of code found in the
-        source file with the given `filename`.
+        Return a sequence of namedtuple `Line` for each line of code found in
+        the source file with the given `filename`. The source is shared with
+        `Cobertura.source_lines()` and the `Line` objects are built as they
+        are accessed (see `FileSource`).
         """
         if self.filesystem is None:
             self._raise_MissingFileSystem(filename)
 
-        lines = []
         try:
-            with self.filesystem.open(filename) as f:
-                line_statuses = dict(self.line_statuses(filename))
-                for lineno, source in enumerate(f, start=1):
-                    line_status = line_statuses.get(lineno)
-                    line = Line(lineno, source, line_status, None)
-                    lines.append(line)
-
+            source_lines = self.source_lines(filename)
         except self.filesystem.FileNotFound as file_not_found:
-            lines.append(Line(0, f"{file_not_found.path} not found", None, None))
+            return [Line(0, f"{file_not_found.path} not found", None, None)]
 
-        return lines
+        return FileSource.from_line_statuses(source_lines, self.line_statuses(filename))
 
     def total_misses(self, filename=None, ignore_regex=None):
         """
@@ -242,14 +606,8 @@ The following exceptions occurred while attempting to parse the report:
         number of uncovered statements for all files.
         """
         if filename is not None:
-            return len(self.missed_statements(filename))
-
-        return sum(
-            [
-                len(self.missed_statements(filename))
-                for filename in self.files(ignore_regex)
-            ]
-        )
+            return self._files[filename].total_misses
+        return self._totals(ignore_regex).misses
 
     def total_hits(self, filename=None, ignore_regex=None):
         """
@@ -258,13 +616,8 @@ The following exceptions occurred while attempting to parse the report:
         number of covered statements for all files.
         """
         if filename is not None:
-            return len(self.hit_statements(filename))
-        return sum(
-            [
-                len(self.hit_statements(filename))
-                for filename in self.files(ignore_regex)
-            ]
-        )
+            return self._files[filename].hits
+        return self._totals(ignore_regex).hits
 
     def total_statements(self, filename=None, ignore_regex=None):
         """
@@ -273,61 +626,153 @@ The following exceptions occurred while attempting to parse the report:
         number of statements for all files.
         """
         if filename is not None:
-            return len(self._get_lines_by_filename(filename))
-        return sum(
-            [
-                len(self._get_lines_by_filename(filename))
-                for filename in self.files(ignore_regex)
-            ]
+            return len(self._files[filename].numbers)
+        return self._totals(ignore_regex).statements
+
+    @memoize(maxsize=32)
+    def _totals(self, ignore_regex=None):
+        """
+        Return the `_Totals` of the files that do not match `ignore_regex`.
+        The totals of the whole report are counted once at parse time.
+        """
+        if not ignore_regex:
+            return self._report_totals
+        return _sum_totals(
+            self._files[filename] for filename in self.files(ignore_regex)
         )
 
-    @memoize
+    @memoize(maxsize=32)
     def files(self, ignore_regex=None):
         """
-        Return the list of available files in the coverage report.
+        Return the list of available files in the coverage report, without
+        the files matching `ignore_regex` (a regex, the path to an ignore file
+        or an `IgnoreFilter`, see `pycobertura.utils.compile_ignore_filter`).
         """
-        # maybe replace with a trie at some point? see has_file FIXME
-        already_seen = set()
-        filenames = []
-
-        for el in self.xml.xpath("//class"):
-            filename = el.get("filename")
-            if filename in already_seen:
-                continue
-            already_seen.add(filename)
-            filenames.append(filename)
-
-        return (
-            filenames
-            if not ignore_regex
-            else get_filenames_that_do_not_match_regex(filenames, ignore_regex)
-        )
+        if not ignore_regex:
+            return self._filenames
+        return compile_ignore_filter(ignore_regex)(self._filenames)
 
     def has_file(self, filename):
         """
         Return `True` if the file `filename` is present in the report, return
         `False` otherwise.
         """
-        # FIXME: this will lookup a list which is slow, make it O(1)
-        return filename in self.files()
+        return filename in self._files
 
-    @memoize
+    @memoize(maxbytes=SOURCE_CACHE_BYTES, sizeof=_source_size)
     def source_lines(self, filename: str):
         """
-        Return a list for source lines of file `filename`.
+        Return the sequence of the source lines of file `filename`, decoded as
+        they are accessed (see `pycobertura.filesystem.SourceLines`).
         """
         if self.filesystem is None:
             self._raise_MissingFileSystem(filename)
 
-        with self.filesystem.open(filename) as f:
-            return f.readlines()
+        return self.filesystem.read_lines(filename)
 
     @memoize
     def packages(self):
         """
         Return the list of available packages in the coverage report.
         """
-        return [el.get("name") for el in self.xml.xpath("//package")]
+        return list(self._packages)
+
+
+def load_many(reports, jobs=None, filesystem=None, cache_dir=None):
+    """
+    Return a list of `Cobertura` objects for the report paths `reports`, in
+    the same order. The reports are parsed in streaming mode by a pool of
+    `jobs` processes (one per CPU by default) which send back the compact
+    per-file line data of each report rather than XML trees.
+
+    `filesystem` and `cache_dir` are passed to every `Cobertura`, see
+    `Cobertura.__init__`.
+    """
+    reports = list(reports)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(reports))
+
+    if jobs <= 1:
+        states = [_load_state(report, cache_dir) for report in reports]
+    else:
+        with _process_pool(jobs) as workers:
+            states = list(workers.map(_load_state, reports, [cache_dir] * len(reports)))
+
+    return [
+        Cobertura._from_state(report, state, filesystem=filesystem)
+        for report, state in zip(reports, states)
+    ]
+
+
+def _load_state(report, cache_dir):
+    return Cobertura(report, streaming=True, cache_dir=cache_dir)._get_state()
+
+
+def total_misses_exceed(report, threshold, ignore_regex=None):
+    """
+    Return `True` if the total number of uncovered statements of the Cobertura
+    report `report`, a path or a file object, exceeds `threshold`, without
+    building the report. The files matching `ignore_regex` are left out, see
+    `Cobertura.total_misses()`.
+
+    This relies on the summary attributes of the report: partially covered
+    lines count as uncovered statements but are covered in the `lines-covered`
+    attribute, so `lines-valid` minus `lines-covered` is a lower bound of the
+    number of uncovered statements and the answer is `True` right away when it
+    exceeds `threshold`. A report whose summary attributes do not match its
+    lines (e.g. edited by hand) can thus give a different answer than
+    `Cobertura(report).total_misses() > threshold`. The attributes are not
+    used when `ignore_regex` is given or when they are inconsistent. Otherwise
+    the uncovered statements are counted in a single streaming pass that stops
+    as soon as they exceed `threshold`.
+    """
+    ignore_filter = compile_ignore_filter(ignore_regex) if ignore_regex else None
+    with open_report(report) as f:
+        return _total_misses_exceed(f, threshold, ignore_filter)
+
+
+def _total_misses_exceed(source, threshold, ignore_filter):
+    misses = 0
+    context = ET.iterparse(source, events=("start", "end"), tag=("coverage", "class"))
+    for event, elem in context:
+        if elem.tag == "coverage":
+            if (
+                event == "start"
+                and ignore_filter is None
+                and _misses_lower_bound(elem.attrib) > threshold
+            ):
+                return True
+            continue
+        if event == "start":
+            continue
+
+        if ignore_filter is None or not ignore_filter.ignores(elem.get("filename")):
+            for line in elem.iterfind("lines/line"):
+                if get_line_status(line) != "hit":
+                    misses += 1
+            if misses > threshold:
+                return True
+
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    return False
+
+
+def _misses_lower_bound(root_attrib):
+    """
+    Return `lines-valid` minus `lines-covered` of the root attributes
+    `root_attrib`, or 0 if they are missing or inconsistent.
+    """
+    try:
+        lines_valid = int(root_attrib["lines-valid"])
+        lines_covered = int(root_attrib["lines-covered"])
+    except (KeyError, ValueError):
+        return 0
+    if not 0 <= lines_covered <= lines_valid:
+        return 0
+    return lines_valid - lines_covered
 
 
 class CoberturaDiff:
@@ -335,9 +780,53 @@ class CoberturaDiff:
     Diff Cobertura objects.
     """
 
-    def __init__(self, cobertura1, cobertura2):
+    def __init__(self, cobertura1, cobertura2, jobs=1, cache_lines=DEFAULT_CACHE_LINES):
+        """
+        `jobs` is the number of files that are diffed in parallel, see
+        `CoberturaDiff.iter_file_sources()`.
+
+        The diffed source of the files is cached, so that it is computed once
+        for all the methods that need it, up to a total of `cache_lines`
+        lines. The least recently used files are evicted first. Pass
+        `cache_lines=0` to disable the cache or `None` for an unbounded one.
+        """
         self.cobertura1: Cobertura = cobertura1
         self.cobertura2: Cobertura = cobertura2
+        self.jobs = jobs
+        self.file_source_cache = LRUCache(cache_lines)
+        # the thread and process pools of the parallel diffs, see `_executors`
+        self._readers = None
+        self._workers = None
+
+    def close(self):
+        """
+        Shut down the pools of threads and processes that diff the files in
+        parallel (see `CoberturaDiff.iter_file_sources()`), if they were
+        started. They are started again if needed.
+        """
+        readers, workers = self._readers, self._workers
+        self._readers = self._workers = None
+        if readers is not None:
+            readers.shutdown()
+        if workers is not None:
+            workers.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _executors(self):
+        """
+        Return the tuple `(readers, workers)` of the thread pool reading the
+        sources and of the process pool diffing them, started on first use
+        and kept until `CoberturaDiff.close()`.
+        """
+        if self._workers is None:
+            self._readers = futures.ThreadPoolExecutor(self.jobs)
+            self._workers = _process_pool(self.jobs)
+        return self._readers, self._workers
 
     def has_better_coverage(self):
         """
@@ -346,21 +835,97 @@ class CoberturaDiff:
         This does not ensure that all changes have been covered. If this is
         what you want, use `CoberturaDiff.has_all_changes_covered()` instead.
         """
-        return not (
-            any(self.diff_total_misses(filename) > 0 for filename in self.files())
-        )
+        return not any(change > 0 for _, change in self._miss_count_changes())
+
+    def _miss_count_changes(self):
+        """
+        Yield the tuples `(filename, change)` of the files whose number of
+        uncovered statements changed between both reports, where `change` is
+        the difference of the number of uncovered statements. The numbers are
+        read from the counters of each file, computed when the reports were
+        parsed.
+        """
+        files1 = self.cobertura1._files
+        files2 = self.cobertura2._files
+        for filename, lines2 in files2.items():
+            lines1 = files1.get(filename)
+            misses1 = 0 if lines1 is None else lines1.total_misses
+            change = lines2.total_misses - misses1
+            if change:
+                yield filename, change
+        for filename, lines1 in files1.items():
+            if filename not in files2 and lines1.total_misses:
+                yield filename, -lines1.total_misses
+
+    def _gate_order(self):
+        """
+        Return the files of the second report in the order in which
+        `has_all_changes_covered()` checks them: the files whose number of
+        uncovered statements increased first, as they are the most likely to
+        have uncovered changes, then the other files whose number of uncovered
+        statements changed and then the rest of the files.
+
+        Files that are only in the first report are left out, they have no
+        line left to cover.
+        """
+        files2 = self.cobertura2._files
+        changes = {
+            filename: change
+            for filename, change in self._miss_count_changes()
+            if filename in files2
+        }
+        likely_violators = sorted(changes, key=lambda filename: -changes[filename])
+        others = sorted(filename for filename in files2 if filename not in changes)
+        return likely_violators + others
+
+    @memoize
+    def is_unchanged(self, filename):
+        """
+        Return `True` if the file `filename` has the same source code and the
+        same line statuses in both reports, in which case none of its lines
+        changed status and the file can be skipped without diffing its source.
+        """
+        cobertura1, cobertura2 = self.cobertura1, self.cobertura2
+        if not (cobertura1.has_file(filename) and cobertura2.has_file(filename)):
+            return False
+        if cobertura1.filesystem is None or cobertura2.filesystem is None:
+            return False
+
+        lines1 = cobertura1._files[filename]
+        lines2 = cobertura2._files[filename]
+        if lines1.numbers != lines2.numbers or lines1.statuses != lines2.statuses:
+            return False
+
+        fingerprint1 = cobertura1.filesystem.fingerprint(filename)
+        if fingerprint1 is None:
+            return False
+        return fingerprint1 == cobertura2.filesystem.fingerprint(filename)
 
     def has_all_changes_covered(self):
         """
         Return `True` if all changes have been covered, `False` otherwise.
+
+        The files most likely to have uncovered changes are checked first and
+        the check stops at the first uncovered change.
         """
-        for filename in self.files():
-            for hunk in self.file_source_hunks(filename):
-                for line in hunk:
-                    if line.reason is None:
-                        continue  # line untouched
-                    if line.status != "hit":
-                        return False  # line not covered
+        not_diffed = []
+        for filename in self._gate_order():
+            lines = self.file_source_cache.get(filename)
+            if lines is None:
+                not_diffed.append(filename)
+            elif _any_uncovered_change(
+                (line.number, line.status, line.reason)
+                for line in lines.changed_lines()
+            ):
+                return False
+
+        # Files that were not diffed yet are only checked, which is cheaper
+        # than building their file source.
+        results = self._iter_diffs(not_diffed, has_uncovered_changes, _skip)
+        for _, uncovered_changes in results:
+            if uncovered_changes:
+                results.close()
+                return False
         return True
 
     def _diff_attr(self, attr_name, filename):
@@ -411,30 +976,52 @@ class CoberturaDiff:
         Return a list of 2-element tuples `(lineno, status)` for uncovered lines.
         The given file `filename` where `lineno` is a missed line number.
         """
-        return [
-            (line.number, line.status)
-            for line in self.file_source(filename)
-            if (line.status == "miss" or line.status == "partial")
-        ]
+        if self.is_unchanged(filename):
+            return []
+        return _missed_lines(self.file_source(filename))
 
     def files(self, ignore_regex=None):
         """
         Return the total of all files we're comparing.
         """
-        f = list(
-            set(
-                self.cobertura2.files(ignore_regex)
-                + self.cobertura1.files(ignore_regex)
+        if ignore_regex:
+            # compiled once for both reports
+            ignore_regex = compile_ignore_filter(ignore_regex)
+        return sorted(
+            set(self.cobertura2.files(ignore_regex)).union(
+                self.cobertura1.files(ignore_regex)
             )
         )
-        f.sort()
-        return f
 
     def file_source(self, filename: str):
         """
         Return a list of namedtuple `Line` for each line of code found in the
         given file `filename`.
 
+        """
+        lines = self.file_source_cache.get(filename)
+        if lines is None:
+            lines = self._diff(filename, diff_file_source, self._unchanged_file_source)
+            self.file_source_cache.put(filename, lines)
+        return lines
+
+    def _diff(self, filename, diff, unchanged):
+        """
+        Return `diff(*inputs)`, where `inputs` are the `_file_source_inputs()`
+        of the file `filename`, or `unchanged(filename)` if the file is
+        unchanged.
+        """
+        if self.is_unchanged(filename):
+            return unchanged(filename)
+        return diff(*self._file_source_inputs(filename))
+
+    def _unchanged_file_source(self, filename):
+        return FileSource(self.cobertura2.source_lines(filename))
+
+    def _file_source_inputs(self, filename):
+        """
+        Read everything `diff_file_source()` needs to diff the file `filename`:
+        the source lines and the line statuses of the file in both reports.
         """
         nonexistent = True
         if self.cobertura1.has_file(filename) and self.cobertura1.filesystem.has_file(
@@ -461,47 +1048,98 @@ class CoberturaDiff:
             # try to get source lines anyway, to get the exception traceback
             self.cobertura2.source_lines(filename)
 
-        # Build a dict of lineno2 -> lineno1
-        lineno_map = reconcile_lines(lines2, lines1)
-
-        # if we are using a single coverage file, we need to translate the
-        # coverage of lines1 so that it corresponds to its real lines.
-        if self.cobertura1 == self.cobertura2:
-            line_statuses1 = {}
-            for l2, l1 in lineno_map.items():
-                line_statuses1[l1] = line_statuses2.get(l2)
-
-        lines = []
-        for lineno, source in enumerate(lines2, start=1):
-            status = None
-            reason = None
-            if lineno not in lineno_map:
-                # line was added or removed, just use whatever coverage status
-                # is available as there is nothing to compare against.
-                status = line_statuses2.get(lineno)
-                reason = "line-edit"
+        same_report = self.cobertura1 == self.cobertura2
+        return lines1, line_statuses1, lines2, line_statuses2, same_report
+
+    def iter_file_sources(self, filenames):
+        """
+        Yield a tuple `(filename, file_source)` for each file of `filenames`,
+        in the same order, where `file_source` is what
+        `CoberturaDiff.file_source(filename)` returns.
+
+        When the diff was created with `jobs` greater than 1, the source files
+        are read by a pool of `jobs` threads and diffed by a pool of `jobs`
+        processes, with at most `jobs * 4` files in flight at a time.
+        """
+        return self._iter_file_sources(filenames, skip_unchanged=False)
+
+    def iter_file_source_hunks(self, filenames):
+        """
+        Like `CoberturaDiff.iter_file_sources`, but yield the tuples
+        `(filename, file_source_hunks)` (see `CoberturaDiff.file_source_hunks`).
+        """
+        for filename, lines in self._iter_file_sources(filenames, skip_unchanged=True):
+            yield filename, hunkify_lines(lines) if lines is not None else []
+
+    def iter_diff_missed_lines(self, filenames):
+        """
+        Like `CoberturaDiff.iter_file_sources`, but yield the tuples
+        `(filename, missed_lines)` (see `CoberturaDiff.diff_missed_lines`).
+        """
+        for filename, lines in self._iter_file_sources(filenames, skip_unchanged=True):
+            yield filename, _missed_lines(lines) if lines is not None else []
+
+    def _iter_file_sources(self, filenames, skip_unchanged):
+        # The file source of unchanged files is `None` when `skip_unchanged`
+        # is set, which saves reading their source.
+        if self.jobs <= 1:
+            for filename in filenames:
+                if skip_unchanged and self.is_unchanged(filename):
+                    yield filename, None
+                else:
+                    yield filename, self.file_source(filename)
+            return
+
+        unchanged = _skip if skip_unchanged else self._unchanged_file_source
+        yield from self._iter_diffs(
+            filenames, diff_file_source, unchanged, self.file_source_cache
+        )
+
+    def _iter_diffs(self, filenames, diff, unchanged, cache=None):
+        """
+        Yield the tuples `(filename, self._diff(filename, diff, unchanged))`
+        for the files of `filenames`, in the same order. The diffs are
+        computed in parallel when `jobs` is greater than 1 (see
+        `CoberturaDiff.iter_file_sources()`). When the LRU cache `cache` is
+        given, the diffs are looked up in it first and stored in it after.
+        """
+        if self.jobs <= 1:
+            for filename in filenames:
+                yield filename, self._diff(filename, diff, unchanged)
+            return
+
+        window = self.jobs * 4
+        readers, workers = self._executors()
+        pending = deque()
+        for filename in filenames:
+            result = None if cache is None else cache.get(filename)
+            if result is not None:
+                future = _resolved(_resolved(result))
             else:
-                other_lineno = lineno_map[lineno]
-                line_status1 = line_statuses1.get(other_lineno)
-                line_status2 = line_statuses2.get(lineno)
-                if line_status1 == line_status2:
-                    status = None  # unchanged
-                    reason = None
-                elif (line_status1 == "hit" and line_status2 != "hit") or (
-                    line_status1 == "partial" and line_status2 == "miss"
-                ):
-                    status = line_status2  # decreased
-                    reason = "cov-down"
-                elif (line_status1 != "hit" and line_status2 == "hit") or (
-                    line_status1 == "miss" and line_status2 == "partial"
-                ):
-                    status = line_status2  # increased
-                    reason = "cov-up"
-
-            line = Line(lineno, source, status, reason)
-            lines.append(line)
+                future = readers.submit(
+                    self._submit_diff, workers, filename, diff, unchanged
+                )
+            pending.append((filename, future))
+            if len(pending) >= window:
+                yield self._collect_diff(*pending.popleft(), cache)
+        while pending:
+            yield self._collect_diff(*pending.popleft(), cache)
 
-        return lines
+    def _submit_diff(self, workers, filename, diff, unchanged):
+        """
+        Read the inputs of the diff of `filename` and submit the diff to the
+        `workers` process pool. Return the future of the result of the diff.
+        """
+        if self.is_unchanged(filename):
+            return _resolved(unchanged(filename))
+        return workers.submit(diff, *self._file_source_inputs(filename))
+
+    @staticmethod
+    def _collect_diff(filename, future, cache):
+        result = future.result().result()
+        if cache is not None and result is not None:
+            cache.put(filename, result)
+        return filename, result
 
     def file_source_hunks(self, filename):
         """
@@ -510,6 +1148,145 @@ class CoberturaDiff:
         list means that the file has no lines that have a change in coverage
         status.
         """
+        if self.is_unchanged(filename):
+            return []
         lines = self.file_source(filename)
         hunks = hunkify_lines(lines)
         return hunks
+
+
+def _process_pool(jobs):
+    """
+    Return a pool of `jobs` processes that are not forked from this process:
+    the diffs submit to it from reader threads, and forking a process that
+    runs threads can deadlock on a lock held by another thread.
+    """
+    import multiprocessing
+
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+    else:
+        context = multiprocessing.get_context("spawn")
+    return futures.ProcessPoolExecutor(jobs, mp_context=context)
+
+
+def _resolved(value):
+    future = futures.Future()
+    future.set_result(value)
+    return future
+
+
+def _skip(filename):
+    return None
+
+
+def _missed_lines(lines):
+    return [
+        (line.number, line.status)
+        for line in lines.changed_lines()
+        if (line.status == "miss" or line.status == "partial")
+    ]
+
+
+def diff_file_source(lines1, line_statuses1, lines2, line_statuses2, same_report):
+    """
+    Return the `FileSource` of `lines2`, the source lines of a file in the
+    second report, with the status and the reason of the change of coverage
+    of each line compared to `lines1`, the source lines of the file in the
+    first report. `line_statuses1` and `line_statuses2` map the line numbers
+    of each report to their line status.
+
+    This is the CPU-bound part of `CoberturaDiff.file_source()`, it is a
+    plain function so that it can run in a separate process.
+    """
+    changes = _line_changes(lines1, line_statuses1, lines2, line_statuses2, same_report)
+    file_source = FileSource(lines2)
+    statuses, reasons = file_source.statuses, file_source.reasons
+    for index, (status, reason) in zip(range(len(lines2)), changes):
+        statuses[index] = _STATUS_CODES[status]
+        reasons[index] = _REASON_CODES[reason]
+    return file_source
+
+
+def has_uncovered_changes(lines1, line_statuses1, lines2, line_statuses2, same_report):
+    """
+    Return `True` if any of the lines that `diff_file_source()` would report
+    as changed is not covered. Unlike `diff_file_source()`, no `Line` is built
+    and the check stops at the first uncovered change.
+    """
+    changes = _line_changes(lines1, line_statuses1, lines2, line_statuses2, same_report)
+    return _any_uncovered_change(
+        (lineno, status, reason)
+        for lineno, (status, reason) in enumerate(changes, 1)
+        if status is not None or reason is not None
+    )
+
+
+def _any_uncovered_change(changes, context=3):
+    """
+    Return `True` if any of the changes `(lineno, status, reason)` of
+    `changes`, in line order, is an uncovered change.
+
+    A line with a reason is a changed line and must be covered, but only when
+    it would show in a hunk of `hunkify_lines()`, that is within `context`
+    lines of a line with a status. Edits of lines without any status nearby,
+    e.g. of comments or blank lines, are not changes to cover.
+    """
+    last_status = None  # line number of the last line with a status
+    pending = None  # line number of the last uncovered change not in a hunk
+    for lineno, status, reason in changes:
+        if status is not None:
+            if reason is not None and status != "hit":
+                return True
+            if pending is not None and lineno - pending <= context:
+                return True
+            last_status, pending = lineno, None
+        elif reason is not None:
+            if last_status is not None and lineno - last_status <= context:
+                return True
+            pending = lineno
+    return False
+
+
+def _line_changes(lines1, line_statuses1, lines2, line_statuses2, same_report):
+    """
+    Yield the tuple `(status, reason)` of each line of `lines2`, see
+    `diff_file_source()`.
+    """
+    # Build a dict of lineno2 -> lineno1
+    lineno_map = reconcile_lines(lines2, lines1)
+
+    # if we are using a single coverage file, we need to translate the
+    # coverage of lines1 so that it corresponds to its real lines.
+    if same_report:
+        line_statuses1 = {}
+        for l2, l1 in lineno_map.items():
+            line_statuses1[l1] = line_statuses2.get(l2)
+
+    for lineno in range(1, len(lines2) + 1):
+        status = None
+        reason = None
+        if lineno not in lineno_map:
+            # line was added or removed, just use whatever coverage status
+            # is available as there is nothing to compare against.
+            status = line_statuses2.get(lineno)
+            reason = "line-edit"
+        else:
+            other_lineno = lineno_map[lineno]
+            line_status1 = line_statuses1.get(other_lineno)
+            line_status2 = line_statuses2.get(lineno)
+            if line_status1 == line_status2:
+                status = None  # unchanged
+                reason = None
+            elif (line_status1 == "hit" and line_status2 != "hit") or (
+                line_status1 == "partial" and line_status2 == "miss"
+            ):
+                status = line_status2  # decreased
+                reason = "cov-down"
+            elif (line_status1 != "hit" and line_status2 == "hit") or (
+                line_status1 == "miss" and line_status2 == "partial"
+            ):
+                status = line_status2  # increased
+                reason = "cov-up"
+
+        yield status, reason
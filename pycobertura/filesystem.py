@@ -1,10 +1,98 @@
 import codecs
+import hashlib
+import mmap
 import os
 import io
+import posixpath
+import re
+import threading
+import weakref
 import zipfile
 import subprocess
 
+from array import array
+from collections.abc import Sequence
 from contextlib import contextmanager
+from itertools import accumulate, chain
+
+# Source files of at least this size are memory-mapped by
+# `DirectoryFileSystem.read_lines()` instead of being read in memory. Set it
+# to `None` to read every file in memory.
+MMAP_MIN_SIZE = 1024 * 1024
+
+
+def git_blob_id(content):
+    """
+    Return the SHA-1 that git gives to a blob of content `content` (bytes).
+    """
+    header = f"blob {len(content)}\0".encode()
+    return hashlib.sha1(header + content).hexdigest()
+
+
+class SourceLines(Sequence):
+    """
+    The lines of a source file, decoded from its raw UTF-8 content `data`
+    (bytes or a memory map) only when they are accessed. The content is kept
+    once, along with the offsets of the starts of the lines. Lines end with
+    `\n`, which they keep, except maybe the last one.
+    """
+
+    __slots__ = ("data", "_starts")
+
+    def __init__(self, data):
+        self.data = data
+        if isinstance(data, bytes):
+            # `BytesIO` splits the lines at `\n` only, and faster than a loop
+            starts = chain([0], accumulate(map(len, io.BytesIO(data))))
+        else:
+            # do not copy a memory map
+            starts = chain([0], (match.end() for match in _LINE_END.finditer(data)))
+        self._starts = array("Q", starts)
+        if self._starts[-1] != len(data):
+            self._starts.append(len(data))
+
+    def __len__(self):
+        return len(self._starts) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("source line index out of range")
+        start, end = self._starts[index], self._starts[index + 1]
+        return self.data[start:end].decode("utf-8")
+
+    def __iter__(self):
+        if not isinstance(self.data, bytes):
+            return (self[index] for index in range(len(self)))
+        return map(_decode_utf8, io.BytesIO(self.data))
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # a memory map cannot be pickled, send its content instead
+        return SourceLines, (bytes(self.data),)
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes of the content and of the line index.
+        """
+        return len(self.data) + self._starts.itemsize * len(self._starts)
+
+
+_LINE_END = re.compile(b"\n")
+
+
+def _decode_utf8(line):
+    return line.decode("utf-8")
 
 
 class FileSystem:
@@ -13,6 +101,38 @@ class FileSystem:
             super(self.__class__, self).__init__(path)
             self.path = path
 
+    def read_lines(self, filename):
+        """
+        Return the `SourceLines` of the file `filename`.
+        """
+        with self.open(filename) as f:
+            return SourceLines(f.read().encode("utf-8"))
+
+    def fingerprint(self, filename):
+        """
+        Return a fingerprint of the content of the file `filename`, or `None`
+        if the file does not exist. Files with the same fingerprint have the
+        same content. The fingerprint is the git blob SHA of the content so
+        that it can be compared with `GitFileSystem.blob_id`.
+        """
+        try:
+            with self.open(filename) as f:
+                content = f.read()
+        except self.FileNotFound:
+            return None
+        return git_blob_id(content.encode("utf-8"))
+
+    def close(self):
+        """
+        Release the resources held by the filesystem, if any.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
 
 class DirectoryFileSystem(FileSystem):
     def __init__(self, source_dir, source_prefix=None):
@@ -44,6 +164,29 @@ class DirectoryFileSystem(FileSystem):
         with codecs.open(filename, encoding="utf-8") as f:
             yield f
 
+    def read_lines(self, filename):
+        """
+        Return the `SourceLines` of the file `filename`. Files of at least
+        `MMAP_MIN_SIZE` bytes are memory-mapped rather than read.
+
+        The mapping stays valid as long as the returned lines are used (and
+        `Cobertura` keeps them in its source cache), so the file must not be
+        truncated meanwhile: accessing the pages past the new end of the file
+        raises a `SIGBUS` that kills the process, where a file read in memory
+        would only be stale. Set `MMAP_MIN_SIZE` to `None` if the sources may
+        be truncated while they are reported on.
+        """
+        filename = self.real_filename(filename)
+
+        try:
+            f = open(filename, "rb")
+        except FileNotFoundError:
+            raise self.FileNotFound(filename)
+        with f:
+            if MMAP_MIN_SIZE is None or os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+                return SourceLines(f.read())
+            return SourceLines(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
 
 class ZipFileSystem(FileSystem):
     def __init__(self, zip_file, source_prefix=None):
@@ -60,6 +203,9 @@ class ZipFileSystem(FileSystem):
         # FIXME: make this O(1)
         return self.real_filename(filename) in self.zipfile.namelist()
 
+    def close(self):
+        self.zipfile.close()
+
     @contextmanager
     def open(self, filename):
         filename = self.real_filename(filename)
@@ -72,6 +218,115 @@ class ZipFileSystem(FileSystem):
             raise self.FileNotFound(filename)
 
 
+class _GitCatFileProcess:
+    """
+    A long-lived `git cat-file --batch --follow-symlinks` process (or
+    `--batch-check` if `with_content` is `False`) running in the repository
+    `repo_root`. Object names are written to its standard input, one per
+    line, and the objects are read back from its standard output where each
+    of them is framed by a header line giving its size.
+    """
+
+    # Headers `<type> <size>` printed instead of the object by
+    # `--follow-symlinks` when a symlink cannot be resolved within the tree,
+    # they are followed by `<size>` bytes of payload and a newline.
+    UNRESOLVED_SYMLINK_TYPES = {b"symlink", b"dangling", b"loop", b"notdir"}
+
+    def __init__(self, repo_root, with_content=True):
+        batch_option = "--batch" if with_content else "--batch-check"
+        self.with_content = with_content
+        self.lock = threading.Lock()
+        self.process = subprocess.Popen(
+            ["git", "cat-file", batch_option, "--follow-symlinks"],
+            cwd=repo_root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def query(self, spec):
+        """
+        Return the content of the object `spec` as bytes (or `b""` for
+        `--batch-check`), or `None` if the object does not exist. Raise
+        `OSError` if the process died.
+        """
+        with self.lock:
+            stdin, stdout = self.process.stdin, self.process.stdout
+            stdin.write(f"{spec}\n".encode())
+            stdin.flush()
+            header = stdout.readline()
+            if not header.endswith(b"\n"):
+                raise OSError(f"git cat-file exited while reading {spec}")
+
+            if header.endswith((b" missing\n", b" ambiguous\n")):
+                return None
+
+            parts = header.split()
+            if parts[0] in self.UNRESOLVED_SYMLINK_TYPES:
+                stdout.read(int(parts[1]) + 1)
+                return None
+
+            if not self.with_content:
+                return b""
+            content = stdout.read(int(parts[2]) + 1)
+            return content[:-1]
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+class _GitTreeIndex:
+    """
+    The recursive listing of a git tree, as given by `git ls-tree -r -z`:
+    the blob SHA of each file path, the symbolic links and the submodules
+    (path -> commit SHA).
+    """
+
+    def __init__(self, ls_tree_output):
+        self.blobs = {}
+        self.symlinks = set()
+        self.submodules = {}
+        for entry in ls_tree_output.split(b"\0"):
+            # Expected format: "<mode> <type> <sha>\t<path>"
+            try:
+                meta, path = entry.decode("utf-8", errors="replace").split("\t", 1)
+                mode, obj_type, sha = meta.split()
+            except ValueError:
+                continue
+            if obj_type == "blob":
+                self.blobs[path] = sha
+                if mode == "120000":
+                    self.symlinks.add(path)
+            elif mode == "160000" and obj_type == "commit":
+                self.submodules[path] = sha
+
+    def resolves(self, path):
+        """
+        Return `True` if the index alone tells whether `path` exists, that is
+        if neither the path nor any of its parent directories is a symbolic
+        link which only git can follow.
+        """
+        if not self.symlinks:
+            return True
+        while path:
+            if path in self.symlinks:
+                return False
+            path = posixpath.dirname(path)
+        return True
+
+
+def _close_git_cat_file_processes(processes):
+    for process in processes.values():
+        process.close()
+    processes.clear()
+
+
 class GitFileSystem(FileSystem):
     def __init__(self, repo_folder, ref):
         self.repository = repo_folder
@@ -80,56 +335,64 @@ class GitFileSystem(FileSystem):
         # the report may have been collected in a subfolder of the repository
         # root. Each file path shall thus be completed by the prefix.
         self.prefix = self.repository.replace(self.repository_root, "").lstrip("/")
-        # Cache submodule paths and commit SHAs for the provided ref
-        self._submodules = self._discover_submodules()
+        # Index the blobs and submodules of the tree of the provided ref
+        self._tree_index = self._index_tree(self.repository_root, self.ref)
+        self._submodules = self._tree_index.submodules if self._tree_index else {}
+        self._submodule_tree_indexes = {}
+        # `git cat-file` processes, one per (repository, mode), started on
+        # first use and stopped when the filesystem is closed or collected.
+        self._cat_file_processes = {}
+        self._cat_file_processes_lock = threading.Lock()
+        self._finalizer = weakref.finalize(
+            self, _close_git_cat_file_processes, self._cat_file_processes
+        )
+
+    def close(self):
+        """
+        Stop the `git cat-file` processes started by the filesystem.
+        """
+        self._finalizer()
+
+    def _git_cat_file(self, repo_root, spec, with_content):
+        key = (repo_root, with_content)
+        with self._cat_file_processes_lock:
+            process = self._cat_file_processes.get(key)
+            if process is None:
+                process = _GitCatFileProcess(repo_root, with_content)
+                self._cat_file_processes[key] = process
+        try:
+            return process.query(spec)
+        except OSError:
+            # The process died, a new one will be started on the next query.
+            with self._cat_file_processes_lock:
+                if self._cat_file_processes.get(key) is process:
+                    del self._cat_file_processes[key]
+            process.close()
+            raise
 
     def _git_cat_file_check(self, repo_root, spec):
         """
-        Call `git cat-file --batch-check --follow-symlinks`
+        Query `git cat-file --batch-check --follow-symlinks`
         and return existence as bool.
         """
-        args = ["git", "cat-file", "--batch-check", "--follow-symlinks"]
-        input_data = f"{spec}\n".encode()
         try:
-            process = subprocess.Popen(
-                args,
-                cwd=repo_root,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            output, _ = process.communicate(input=input_data)
-            return_code = process.wait()
-        except (OSError, subprocess.CalledProcessError):
+            return self._git_cat_file(repo_root, spec, with_content=False) is not None
+        except OSError:
             return False
-        return return_code == 0 and not output.endswith(b"missing\n")
 
     def _git_cat_file_read(self, repo_root, spec):
         """
-        Call `git cat-file --batch --follow-symlinks` and return blob content as bytes.
-        Raises FileNotFound if the object is missing or on error.
+        Query `git cat-file --batch --follow-symlinks` and return blob content
+        as bytes. Raises FileNotFound if the object is missing or on error.
         """
-        args = ["git", "cat-file", "--batch", "--follow-symlinks"]
-        input_data = f"{spec}\n".encode()
         try:
-            process = subprocess.Popen(
-                args,
-                cwd=repo_root,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            output, _ = process.communicate(input=input_data)
-            return_code = process.wait()
-        except (OSError, subprocess.CalledProcessError):
+            content = self._git_cat_file(repo_root, spec, with_content=True)
+        except OSError:
             raise self.FileNotFound(spec)
 
-        if return_code != 0 or output.endswith(b"missing\n"):
+        if content is None:
             raise self.FileNotFound(spec)
-        lines = output.split(b"\n", 1)
-        if len(lines) < 2:
-            raise self.FileNotFound(spec)
-        return lines[1]
+        return content
 
     def real_filename(self, filename):
         """
@@ -139,18 +402,62 @@ class GitFileSystem(FileSystem):
         prefix = f"{self.prefix}/" if self.prefix else ""
         return f"{self.ref}:{prefix}{filename}"
 
-    def has_file(self, filename):
+    def _locate(self, filename):
         """
-        Check for a file's existence in the specified commit's tree.
+        Return a tuple `(repo_root, spec, tree_index, path)` describing where
+        to find the file `filename`: the repository holding it, its
+        `<commit>:<path>` object name, the tree index of that commit (`None`
+        if unavailable or if symbolic links must be resolved by git) and the
+        path of the file in that tree.
         """
-        # If the file is within a submodule, query the submodule repository
+        # If the file is within a submodule, look it up in the submodule
+        # repository at the pinned commit
         submodule_ctx = self._resolve_submodule_ctx(filename)
         if submodule_ctx is not None:
             submodule_root, sub_commit, rel_path = submodule_ctx
-            return self._git_cat_file_check(submodule_root, f"{sub_commit}:{rel_path}")
+            tree_index = self._submodule_tree_indexes.get(submodule_root)
+            if tree_index is None:
+                tree_index = self._index_tree(submodule_root, sub_commit)
+                self._submodule_tree_indexes[submodule_root] = tree_index
+            repo_root, spec, path = (
+                submodule_root,
+                f"{sub_commit}:{rel_path}",
+                posixpath.normpath(rel_path),
+            )
+        else:
+            tree_index = self._tree_index
+            repo_root, spec = self.repository_root, self.real_filename(filename)
+            path = posixpath.normpath(posixpath.join(self.prefix, filename))
 
-        real_filename = self.real_filename(filename)
-        return self._git_cat_file_check(self.repository_root, real_filename)
+        if tree_index is not None and not tree_index.resolves(path):
+            tree_index = None
+        return repo_root, spec, tree_index, path
+
+    def has_file(self, filename):
+        """
+        Check for a file's existence in the specified commit's tree.
+        """
+        repo_root, spec, tree_index, path = self._locate(filename)
+        if tree_index is None:
+            return self._git_cat_file_check(repo_root, spec)
+        return path in tree_index.blobs
+
+    def blob_id(self, filename):
+        """
+        Return the SHA of the git blob of the file `filename`, or `None` if it
+        is not known without asking git (e.g. behind a symbolic link). Two
+        files with the same blob SHA have the same content.
+        """
+        _, _, tree_index, path = self._locate(filename)
+        if tree_index is None:
+            return None
+        return tree_index.blobs.get(path)
+
+    def fingerprint(self, filename):
+        _, _, tree_index, path = self._locate(filename)
+        if tree_index is None:
+            return super().fingerprint(filename)
+        return tree_index.blobs.get(path)
 
     def _get_root_path(self, repository_folder):
         command = ["git", "rev-parse", "--show-toplevel"]
@@ -170,25 +477,30 @@ class GitFileSystem(FileSystem):
 
         This function is a context manager.
         """
-        # If the file is within a submodule,
-        # read from the submodule repository at the pinned commit
-        submodule_ctx = self._resolve_submodule_ctx(filename)
-        if submodule_ctx is not None:
-            submodule_root, sub_commit, rel_path = submodule_ctx
-            content = self._git_cat_file_read(
-                submodule_root, f"{sub_commit}:{rel_path}"
-            )
-            yield io.StringIO(content.decode("utf-8"))
-            return
+        yield io.StringIO(self._read(filename).decode("utf-8"))
 
-        real_filename = self.real_filename(filename)
-        content = self._git_cat_file_read(self.repository_root, real_filename)
-        yield io.StringIO(content.decode("utf-8"))
+    def read_lines(self, filename):
+        return SourceLines(self._read(filename))
 
-    def _discover_submodules(self):
+    def _read(self, filename):
         """
-        Discover submodule paths and SHAs for the given ref by inspecting the tree.
-        Returns a mapping of submodule path -> commit SHA.
+        Return the content of the file `filename` as bytes.
+        """
+        repo_root, spec, tree_index, path = self._locate(filename)
+        if tree_index is not None:
+            blob_sha = tree_index.blobs.get(path)
+            if blob_sha is None:
+                raise self.FileNotFound(spec)
+            try:
+                return self._git_cat_file_read(repo_root, blob_sha)
+            except self.FileNotFound:
+                raise self.FileNotFound(spec)
+        return self._git_cat_file_read(repo_root, spec)
+
+    def _index_tree(self, repo_root, treeish):
+        """
+        Return the `_GitTreeIndex` of the tree `treeish` of the repository
+        `repo_root`, or `None` if it cannot be listed.
         """
         try:
             output = subprocess.check_output(
@@ -196,28 +508,15 @@ class GitFileSystem(FileSystem):
                     "git",
                     "ls-tree",
                     "-r",
+                    "-z",
                     "--full-tree",
-                    self.ref,
+                    treeish,
                 ],
-                cwd=self.repository_root,
+                cwd=repo_root,
             )
         except (OSError, subprocess.CalledProcessError):
-            return {}
-
-        submodules = {}
-        for line in output.decode("utf-8", errors="replace").splitlines():
-            # Expected format: "160000 commit <sha>\t<path>"
-            try:
-                meta, path = line.split("\t", 1)
-            except ValueError:
-                continue
-            parts = meta.split()
-            if len(parts) < 3:
-                continue
-            mode, obj_type, sha = parts[0], parts[1], parts[2]
-            if mode == "160000" and obj_type == "commit":
-                submodules[path] = sha
-        return submodules
+            return None
+        return _GitTreeIndex(output)
 
     def _resolve_submodule_ctx(self, filename):
         """
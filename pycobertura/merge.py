@@ -0,0 +1,290 @@
+"""
+Merging of Cobertura reports.
+
+`merge_reports()` combines the reports produced by test runs that were split
+across several workers into one report, as if all the tests had run at once:
+the hits of a line are summed over the reports and a branch is covered if it
+is covered in any of them.
+
+The reports are read one `<class>` element at a time with
+`lxml.etree.iterparse` and only the merged lines are kept, so the memory used
+depends on the size of the merged report and not on the number or the size of
+the reports merged. The merged report is written incrementally with
+`lxml.etree.xmlfile`.
+"""
+
+import re
+
+import lxml.etree as ET
+
+from pycobertura.utils import open_report
+
+_CONDITION_COVERAGE = re.compile(r"\((\d+)/(\d+)\)")
+
+
+class _MergedBranch:
+    """
+    The condition coverage of a branch line merged over several reports.
+
+    `missing_branches` is the list of the branches that are not covered in
+    any report, or `None` if a report did not tell which branches it missed.
+    `reported` tells whether any report had a condition coverage for the
+    line: the reports without one are left out of the merge.
+    """
+
+    __slots__ = ("conditions_covered", "conditions", "missing_branches", "reported")
+
+    def __init__(self):
+        self.conditions_covered = 0
+        self.conditions = 0
+        self.missing_branches = None
+        self.reported = False
+
+    def add(self, line):
+        """
+        Merge the condition coverage of the `<line>` element `line`.
+        """
+        match = _CONDITION_COVERAGE.search(line.get("condition-coverage", ""))
+        if match is None:
+            # unknown coverage, the other reports tell which branches are covered
+            return
+        covered, conditions = map(int, match.groups())
+        self.conditions_covered = max(self.conditions_covered, covered)
+        self.conditions = max(self.conditions, conditions)
+
+        missing_branches = line.get("missing-branches")
+        if missing_branches is not None:
+            missing_branches = missing_branches.split(",")
+        elif covered == conditions:
+            missing_branches = []
+
+        if not self.reported:
+            self.reported = True
+            self.missing_branches = missing_branches
+        elif self.missing_branches is not None:
+            if missing_branches is None:
+                self.missing_branches = None
+            else:
+                # a branch is missing if it is missing in every report
+                self.missing_branches = [
+                    branch
+                    for branch in self.missing_branches
+                    if branch in missing_branches
+                ]
+
+    @property
+    def covered(self):
+        if self.missing_branches is None:
+            return self.conditions_covered
+        return max(
+            self.conditions_covered, self.conditions - len(self.missing_branches)
+        )
+
+    def attrib(self):
+        if not self.reported:
+            return {"branch": "true"}
+        attrib = {
+            "branch": "true",
+            "condition-coverage": _condition_coverage(self.covered, self.conditions),
+        }
+        if self.missing_branches:
+            attrib["missing-branches"] = ",".join(self.missing_branches)
+        return attrib
+
+
+class _MergedClass:
+    """
+    The lines of a `<class>` element merged over several reports: the hits by
+    line number and the `_MergedBranch` of the branch lines by line number.
+    """
+
+    __slots__ = ("name", "filename", "hits", "branches")
+
+    def __init__(self, name, filename):
+        self.name = name
+        self.filename = filename
+        self.hits = {}
+        self.branches = {}
+
+    def add(self, class_element):
+        hits = self.hits
+        branches = self.branches
+        for line in class_element.iterfind("lines/line"):
+            number = int(line.get("number"))
+            hits[number] = hits.get(number, 0) + int(line.get("hits", 0))
+            if line.get("branch") == "true":
+                branch = branches.get(number)
+                if branch is None:
+                    branch = branches[number] = _MergedBranch()
+                branch.add(line)
+
+    def totals(self):
+        """
+        Return the tuple `(lines_valid, lines_covered, branches_valid,
+        branches_covered)` of the class.
+        """
+        lines_covered = len(self.hits) - list(self.hits.values()).count(0)
+        branches_valid = sum(branch.conditions for branch in self.branches.values())
+        branches_covered = sum(branch.covered for branch in self.branches.values())
+        return len(self.hits), lines_covered, branches_valid, branches_covered
+
+    def element(self):
+        """
+        Return the `<class>` element of the merged class.
+        """
+        attrib = {"name": self.name, "filename": self.filename}
+        attrib.update(_rates(self.totals()))
+        element = ET.Element("class", attrib)
+        ET.SubElement(element, "methods")
+        lines = ET.SubElement(element, "lines")
+        hits = self.hits
+        branches = self.branches
+        for number in sorted(hits):
+            line = ET.SubElement(
+                lines, "line", number=str(number), hits=str(hits[number])
+            )
+            branch = branches.get(number)
+            if branch is not None:
+                line.attrib.update(branch.attrib())
+        return element
+
+
+class _MergedReport:
+    def __init__(self):
+        self.version = None
+        self.timestamp = None
+        self.sources = {}
+        # package name -> {(class name, filename): _MergedClass}
+        self.packages = {}
+
+    def add(self, report):
+        """
+        Merge the Cobertura report `report`, a path or a file object.
+        """
+        with open_report(report) as f:
+            self._add_stream(f)
+
+    def _add_stream(self, source):
+        package = None
+        context = ET.iterparse(
+            source,
+            events=("start", "end"),
+            tag=("coverage", "source", "package", "class"),
+        )
+        for event, elem in context:
+            if event == "start":
+                if elem.tag == "coverage":
+                    self._add_root_attrib(elem.attrib)
+                elif elem.tag == "package":
+                    package = self.packages.setdefault(elem.get("name"), {})
+                continue
+
+            if elem.tag == "coverage":
+                break
+            if elem.tag == "source" and elem.text:
+                self.sources.setdefault(elem.text.strip(), None)
+            elif elem.tag == "class":
+                name, filename = elem.get("name"), elem.get("filename")
+                merged_class = package.get((name, filename))
+                if merged_class is None:
+                    merged_class = package[name, filename] = _MergedClass(
+                        name, filename
+                    )
+                merged_class.add(elem)
+            elif elem.tag == "package":
+                package = None
+
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    def _add_root_attrib(self, attrib):
+        if self.version is None:
+            self.version = attrib.get("version")
+        timestamp = attrib.get("timestamp")
+        if timestamp is not None and timestamp.isdigit():
+            self.timestamp = max(int(timestamp), self.timestamp or 0)
+
+    def write(self, output):
+        """
+        Write the merged report to `output`, a path or a binary file object.
+        """
+        package_totals = {
+            name: _sum(merged_class.totals() for merged_class in classes.values())
+            for name, classes in self.packages.items()
+        }
+        root_attrib = {}
+        if self.version is not None:
+            root_attrib["version"] = self.version
+        if self.timestamp is not None:
+            root_attrib["timestamp"] = str(self.timestamp)
+        totals = _sum(package_totals.values())
+        root_attrib.update(
+            {
+                "lines-valid": str(totals[0]),
+                "lines-covered": str(totals[1]),
+                "branches-valid": str(totals[2]),
+                "branches-covered": str(totals[3]),
+            }
+        )
+        root_attrib.update(_rates(totals))
+
+        with ET.xmlfile(output, encoding="utf-8") as xf:
+            xf.write_declaration()
+            with xf.element("coverage", root_attrib):
+                sources = ET.Element("sources")
+                for source in self.sources:
+                    ET.SubElement(sources, "source").text = source
+                xf.write(sources)
+
+                with xf.element("packages"):
+                    for name, classes in self.packages.items():
+                        attrib = {"name": name}
+                        attrib.update(_rates(package_totals[name]))
+                        with xf.element("package", attrib), xf.element("classes"):
+                            for merged_class in classes.values():
+                                xf.write(merged_class.element())
+                                xf.flush()
+
+
+def _sum(totals):
+    return tuple(map(sum, zip((0, 0, 0, 0), *totals)))
+
+
+def _rate(covered, valid, default):
+    return f"{covered / valid:.4g}" if valid else default
+
+
+def _rates(totals):
+    lines_valid, lines_covered, branches_valid, branches_covered = totals
+    return {
+        "line-rate": _rate(lines_covered, lines_valid, "1"),
+        # Like coverage.py, a report without branches has a branch rate of 0.
+        "branch-rate": _rate(branches_covered, branches_valid, "0"),
+    }
+
+
+def _condition_coverage(covered, conditions):
+    percent = 100 * covered // conditions if conditions else 100
+    if 0 < covered < conditions:
+        # Only 0% and 100% mean that no branch and every branch is covered.
+        percent = min(max(percent, 1), 99)
+    return f"{percent}% ({covered}/{conditions})"
+
+
+def merge_reports(reports, output):
+    """
+    Merge the Cobertura reports `reports`, an iterable of paths or file
+    objects, into one Cobertura report written to `output`, a path or a binary
+    file object.
+
+    The hits of a line are summed over the reports. A branch is covered if it
+    is covered in any report: when every report lists the missing branches of
+    a line (the `missing-branches` attribute), the branches missing from all
+    of them are the ones left uncovered, otherwise the best condition coverage
+    of the line is kept.
+    """
+    merged_report = _MergedReport()
+    for report in reports:
+        merged_report.add(report)
+    merged_report.write(output)
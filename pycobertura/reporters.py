@@ -1,23 +1,124 @@
-from jinja2 import Environment, PackageLoader
-from pycobertura.cobertura import Cobertura, CoberturaDiff
+from functools import lru_cache
+from pycobertura.cobertura import DEFAULT_CACHE_LINES, Cobertura, CoberturaDiff
 from pycobertura.utils import (
     green,
     rangify_by_status,
     red,
-    stringify,
+    stringify_ranges,
     calculate_line_rate,
 )
-from pycobertura.templates import filters
-from tabulate import tabulate
-from ruamel import yaml
-import json
 import io
+import os
+import pkgutil
+import sys
+
+# jinja2, tabulate, ruamel.yaml and json are imported by the reporters that use
+# them, on first use, so that the CLI only imports what the format needs.
+
+
+# The CSS inlined in the `<style>` of the HTML reports, read once.
+STATIC_CSS_FILES = ("normalize.css", "skeleton.css")
+
+
+@lru_cache(maxsize=None)
+def get_static_css():
+    """
+    Return the static CSS of the HTML reports, as rendered by the templates
+    until they inlined it with `include`.
+    """
+    css_blocks = []
+    for css_file in STATIC_CSS_FILES:
+        css = pkgutil.get_data("pycobertura", f"templates/{css_file}").decode("utf-8")
+        # Jinja drops a single trailing newline of included templates
+        if css.endswith("\n"):
+            css = css[:-1]
+        css_blocks.append(css)
+    return "\n".join(css_blocks)
+
+
+def get_template_cache_dir():
+    """
+    Return the directory of the user cache where the compiled templates are
+    kept across runs, or `None` if it cannot be written to.
+    """
+    if sys.platform == "win32":
+        cache_home = os.environ.get("LOCALAPPDATA")
+    else:
+        cache_home = os.environ.get("XDG_CACHE_HOME")
+    if not cache_home:
+        cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+    cache_dir = os.path.join(cache_home, "pycobertura", "templates")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        return None
+    return cache_dir if os.access(cache_dir, os.W_OK) else None
+
+
+@lru_cache(maxsize=None)
+def get_template_env():
+    """
+    Return the Jinja `Environment` of the HTML templates, built on first use.
+    The compiled templates are cached in `get_template_cache_dir()` so that
+    they are only compiled again when they change.
+    """
+    from jinja2 import Environment, PackageLoader
+    from pycobertura.templates import filters
+
+    cache_dir = get_template_cache_dir()
+    env = Environment(
+        loader=PackageLoader("pycobertura", "templates"),
+        bytecode_cache=_bytecode_cache(cache_dir) if cache_dir else None,
+    )
+    env.globals["static_css"] = get_static_css()
+    env.filters["line_status"] = filters.line_status
+    env.filters["line_reason"] = filters.line_reason_icon
+    env.filters["is_not_equal_to_dash"] = filters.is_not_equal_to_dash
+    env.filters["misses_color"] = filters.misses_color
+    return env
+
+
+def _bytecode_cache(cache_dir):
+    from jinja2 import FileSystemBytecodeCache
+
+    class BytecodeCache(FileSystemBytecodeCache):
+        def dump_bytecode(self, bucket):
+            try:
+                super().dump_bytecode(bucket)
+            except OSError:
+                # e.g. the disk is full, the template is compiled again next time
+                pass
+
+    return BytecodeCache(cache_dir)
+
+
+def __getattr__(name):
+    # the template environment used to be built on import as `env`
+    if name == "env":
+        return get_template_env()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _tabulate(*args, **kwargs):
+    from tabulate import tabulate
+
+    return tabulate(*args, **kwargs)
+
+
+def _dump_json(data):
+    import json
+
+    return json.dumps(data, indent=4)
+
+
+def _dump_yaml(data):
+    from ruamel import yaml
+
+    # need to write to a buffer as yml packages are using a streaming interface
+    buf = io.BytesIO()
+    yaml.YAML().dump(data, buf)
+    return buf.getvalue()
 
-env = Environment(loader=PackageLoader("pycobertura", "templates"))
-env.filters["line_status"] = filters.line_status
-env.filters["line_reason"] = filters.line_reason_icon
-env.filters["is_not_equal_to_dash"] = filters.is_not_equal_to_dash
-env.filters["misses_color"] = filters.misses_color
 
 headers_with_missing = ["Filename", "Stmts", "Miss", "Cover", "Missing"]
 headers_without_missing = ["Filename", "Stmts", "Miss", "Cover"]
@@ -41,8 +142,8 @@ class Reporter:
 
     @staticmethod
     def format_missing_lines(summary_lines):
-        for i, missing_lines in enumerate(summary_lines["Missing"]):
-            summary_lines["Missing"][i] = stringify(missing_lines)
+        for i, missing_ranges in enumerate(summary_lines["Missing"]):
+            summary_lines["Missing"][i] = stringify_ranges(missing_ranges)
 
     def _maybe_sort_summary_lines(self, summary_lines):
         if not self.sort_by_uncovered_lines:
@@ -90,7 +191,7 @@ class Reporter:
             summary_lines["Stmts"].append(file_statements)
             summary_lines["Miss"].append(file_misses)
             summary_lines["Cover"].append(file_rate)
-            summary_lines["Missing"].append(self.cobertura.missed_lines(filename))
+            summary_lines["Missing"].append(self.cobertura.missed_line_ranges(filename))
 
         # Generate TOTAL row
         total_statements = self.cobertura.total_statements(
@@ -153,7 +254,7 @@ class TextReporter(Reporter):
         summary_lines = self.get_summary_lines()
         self.format_line_rates(summary_lines)
         self.format_missing_lines(summary_lines)
-        return tabulate(summary_lines, headers=headers_with_missing)
+        return _tabulate(summary_lines, headers=headers_with_missing)
 
 
 class CsvReporter(Reporter):
@@ -179,7 +280,7 @@ class MarkdownReporter(Reporter):
         summary_lines = self.get_summary_lines()
         self.format_line_rates(summary_lines)
         self.format_missing_lines(summary_lines)
-        return tabulate(summary_lines, headers=headers_with_missing, tablefmt="github")
+        return _tabulate(summary_lines, headers=headers_with_missing, tablefmt="github")
 
 
 class JsonReporter(Reporter):
@@ -188,7 +289,7 @@ class JsonReporter(Reporter):
         self.format_line_rates(summary_lines)
         self.format_missing_lines(summary_lines)
         stats_dict = self.per_file_stats(summary_lines)
-        return json.dumps(stats_dict, indent=4)
+        return _dump_json(stats_dict)
 
 
 class YamlReporter(Reporter):
@@ -197,10 +298,7 @@ class YamlReporter(Reporter):
         self.format_line_rates(summary_lines)
         self.format_missing_lines(summary_lines)
         stats_dict = self.per_file_stats(summary_lines)
-        # need to write to a buffer as yml packages are using a streaming interface
-        buf = io.BytesIO()
-        yaml.YAML().dump(stats_dict, buf)
-        return buf.getvalue()
+        return _dump_yaml(stats_dict)
 
 
 class HtmlReporter(Reporter):
@@ -225,7 +323,7 @@ class HtmlReporter(Reporter):
                 if i != len(filenames) - 1:  # exclude TOTAL, not a filename
                     sources.append((filename, self.cobertura.file_source(filename)))
 
-        template = env.get_template("html.jinja2")
+        template = get_template_env().get_template("html.jinja2")
         rows = {k: v[:-1] for k, v in summary_lines.items()}
         footer = {k: v[-1] for k, v in summary_lines.items()}
 
@@ -248,7 +346,12 @@ class DeltaReporter:
         *args,
         **kwargs,
     ):
-        self.differ = CoberturaDiff(cobertura1, cobertura2)
+        self.differ = CoberturaDiff(
+            cobertura1,
+            cobertura2,
+            jobs=kwargs.pop("jobs", 1),
+            cache_lines=kwargs.pop("cache_lines", DEFAULT_CACHE_LINES),
+        )
         self.show_source = show_source
         self.color = kwargs.pop("color", False)
         self.ignore_regex = ignore_regex
@@ -346,11 +449,11 @@ class DeltaReporter:
         )
 
         if self.show_source:
-            diff_total_missing = [
-                self.differ.diff_missed_lines(filename) for filename in filenames
-            ]
             summary_lines["Missing"] = [
-                diff_total_missing[i] for i in indexes_of_files_with_changes
+                missed_lines
+                for _, missed_lines in self.differ.iter_diff_missed_lines(
+                    [filenames[i] for i in indexes_of_files_with_changes]
+                )
             ]
             summary_lines["Missing"].append("")  # for total line
 
@@ -386,7 +489,7 @@ class TextReporterDelta(DeltaReporter):
 
             summary_lines["Missing"] = missed_lines_colored
             headers = headers_with_missing
-        return tabulate(summary_lines, headers=headers)
+        return _tabulate(summary_lines, headers=headers)
 
 
 class CsvReporterDelta(DeltaReporter):
@@ -438,7 +541,7 @@ class MarkdownReporterDelta(DeltaReporter):
             ]
             summary_lines["Missing"] = missed_lines_colored
             headers = headers_with_missing
-        return tabulate(summary_lines, headers=headers, tablefmt="github")
+        return _tabulate(summary_lines, headers=headers, tablefmt="github")
 
 
 class JsonReporterDelta(DeltaReporter):
@@ -454,7 +557,7 @@ class JsonReporterDelta(DeltaReporter):
 
         stats_dict = self.per_file_stats(summary_lines)
 
-        json_string = json.dumps(stats_dict, indent=4)
+        json_string = _dump_json(stats_dict)
 
         # for colors, explanation see here:
         # https://stackoverflow.com/a/61273717/9698518
@@ -475,14 +578,11 @@ class YamlReporterDelta(DeltaReporter):
             summary_lines["Missing"] = missed_lines_colored
 
         stats_dict = self.per_file_stats(summary_lines)
-        # need to write to a buffer as yml packages are using a streaming interface
-        buf = io.BytesIO()
-        yaml.YAML().dump(stats_dict, buf)
         # need to replace \e escape sequence with \x1b,
         # because only the latter is supported, see also
         # the Python docs for supported formats:
         # https://docs.python.org/3/reference/lexical_analysis.html#string-and-bytes-literals
-        yaml_string = buf.getvalue().replace(rb"\e", b"\x1b")
+        yaml_string = _dump_yaml(stats_dict).replace(rb"\e", b"\x1b")
         return yaml_string
 
 
@@ -499,7 +599,7 @@ class HtmlReporterDelta(DeltaReporter):
 
     def generate(self):
         summary_lines = self.get_summary_lines()
-        template = env.get_template("html-delta.jinja2")
+        template = get_template_env().get_template("html-delta.jinja2")
 
         rows = {k: v[:-1] for k, v in summary_lines.items()}
         footer = {k: v[-1] for k, v in summary_lines.items()}
@@ -513,8 +613,8 @@ class HtmlReporterDelta(DeltaReporter):
 
         if self.show_source is True:
             render_kwargs["sources"] = []
-            for filename in self.differ.files():
-                differ_file_source_hunks = self.differ.file_source_hunks(filename)
+            files_hunks = self.differ.iter_file_source_hunks(self.differ.files())
+            for filename, differ_file_source_hunks in files_hunks:
                 if differ_file_source_hunks:
                     render_kwargs["sources"].append(
                         (filename, differ_file_source_hunks)
@@ -533,8 +633,8 @@ class GitHubAnnotationReporter(Reporter):
         file_names = self.cobertura.files(ignore_regex=self.ignore_regex)
         result_strs = []
         for file_name in file_names:
-            for range_start, range_end, status in rangify_by_status(
-                self.cobertura.missed_lines(file_name)
+            for range_start, range_end, status in self.cobertura.missed_line_ranges(
+                file_name
             ):
                 result_strs.append(
                     self.to_github_annotation_message(
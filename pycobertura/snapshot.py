@@ -0,0 +1,105 @@
+"""
+Binary snapshots of parsed Cobertura reports.
+
+Parsing a large Cobertura report is expensive while the data that pycobertura
+keeps from it is small: a few arrays of line numbers and line statuses per
+file. A snapshot stores that data with `marshal` so that the next `Cobertura`
+instance created for the same, unchanged, report can skip the XML parsing.
+
+A snapshot is tied to the report it was built from by the report size,
+modification time and SHA-256 digest. The digest is only computed when the
+modification time changed (e.g. a fresh checkout of the same file), so an
+up-to-date snapshot is loaded without reading the report at all.
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+from array import array
+
+# Anything that changes the layout of the snapshot must bump this format.
+SNAPSHOT_FORMAT = (
+    "pycobertura-snapshot",
+    1,
+    marshal.version,
+    sys.byteorder,
+    array("I").itemsize,
+)
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    Return the SHA-256 hex digest of the content of the file at `path`.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ReportSnapshot:
+    """
+    The snapshot of the report file `report_path`, stored in `cache_dir`.
+    """
+
+    def __init__(self, cache_dir, report_path):
+        self.cache_dir = cache_dir
+        self.report_path = os.path.abspath(report_path)
+        path_digest = hashlib.sha1(self.report_path.encode("utf-8")).hexdigest()
+        self.path = os.path.join(
+            cache_dir,
+            f"{os.path.basename(report_path)}.{path_digest[:16]}.snapshot",
+        )
+
+    def load(self):
+        """
+        Return the report state saved in the snapshot or `None` if there is
+        no snapshot or if it is out of date.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                header = marshal.load(f)
+                if not self._is_up_to_date(header):
+                    return None
+                return marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def _is_up_to_date(self, header):
+        snapshot_format, size, mtime_ns, digest = header
+        if snapshot_format != SNAPSHOT_FORMAT:
+            return False
+
+        stat = os.stat(self.report_path)
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime_ns == mtime_ns:
+            return True
+        return file_digest(self.report_path) == digest
+
+    def save(self, state):
+        """
+        Write the report state `state` to the snapshot. The snapshot is
+        replaced atomically so that concurrent readers never see a partial
+        file. Failing to write the snapshot is not an error, the report will
+        simply be parsed again next time.
+        """
+        try:
+            stat = os.stat(self.report_path)
+            digest = file_digest(self.report_path)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    header = (SNAPSHOT_FORMAT, stat.st_size, stat.st_mtime_ns, digest)
+                    marshal.dump(header, f)
+                    marshal.dump(state, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
@@ -1,16 +1,47 @@
-import difflib
+import bisect
+import gzip
+import mmap
 import os
 import re
 import fnmatch
-from functools import partial
+import sys
+import threading
+from stat import S_ISREG
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache, partial, update_wrapper
+from importlib import import_module
 
-from typing import List, Tuple, Union
+from typing import Dict, List, Tuple, Union
 
 try:
     from typing import Literal
 except ImportError:  # pragma: no cover
     from typing_extensions import Literal
 
+# The optional dependencies are imported on first use, see
+# `_optional_module`, to keep the startup of the CLI fast.
+_NOT_IMPORTED = object()
+np = _NOT_IMPORTED
+zstandard = _NOT_IMPORTED
+
+
+def _optional_module(name, module_name):
+    """
+    Return the optional dependency `module_name` bound to the global `name`
+    of this module, importing it on first use, or `None` if it is not
+    installed.
+    """
+    module = globals()[name]
+    if module is _NOT_IMPORTED:
+        try:
+            module = import_module(module_name)
+        except ImportError:
+            module = None
+        globals()[name] = module
+    return module
+
+
 ANSI_ESCAPE_CODES = {
     "green": "\x1b[32m",
     "red": "\x1b[31m",
@@ -18,46 +49,269 @@ ANSI_ESCAPE_CODES = {
 }
 
 
-# Recipe from
-# https://github.com/ActiveState/code/blob/master/recipes/Python/577452_memoize_decorator_instance/recipe-577452.py
-class memoize:
+_KWARGS_MARK = object()
+_MISSING = object()
+
+
+def memoize(func=None, *, maxsize=None, maxbytes=None, sizeof=None):
     """cache the return value of a method
 
-    This class is meant to be used as a decorator of methods. The return value
+    This function is meant to be used as a decorator of methods, either bare
+    (`@memoize`) or with bounds (`@memoize(maxsize=32)`). The return value
     from a given method invocation will be cached on the instance whose method
-    was invoked. All arguments passed to a method decorated with memoize must
-    be hashable.
-
-    If a memoized method is invoked directly on its class the result will not
-    be cached. Instead the method will be invoked like a static method:
+    was invoked, in a `LRUCache` of its own for every method. All arguments
+    passed to a memoized method must be hashable.
+
+    By default every value is kept as long as the instance. The cache of a
+    method can be bounded by a number of entries with `maxsize`, or by an
+    estimated number of bytes with `maxbytes`, where `sizeof(value)` estimates
+    the size of a value (`sys.getsizeof` by default). The least recently used
+    values are then evicted to make room for new ones.
+
+    On an instance, the memoized method has a `cache` attribute, the
+    `LRUCache` of the instance, whose `hits`, `misses` and `evictions` can be
+    read at runtime. If a memoized method is invoked directly on its class the
+    result will not be cached. Instead the method will be invoked like a
+    static method:
     class Obj:
-        @memoize
+        @memoize(maxsize=2)
         def add_to(self, arg):
             return self + arg
     Obj.add_to(1) # not enough arguments
     Obj.add_to(1, 2) # returns 3, result is not cached
     """
+    if maxsize is not None and maxbytes is not None:
+        raise ValueError("memoize takes either maxsize or maxbytes, not both")
+    if func is None:
+        return partial(memoize, maxsize=maxsize, maxbytes=maxbytes, sizeof=sizeof)
+    return _Memoized(func, maxsize, maxbytes, sizeof)
 
-    def __init__(self, func):
+
+class _Memoized:
+    def __init__(self, func, maxsize, maxbytes, sizeof):
         self.target_func = func
+        if maxbytes is not None:
+            self.capacity, self.weigh = maxbytes, sizeof or sys.getsizeof
+        else:
+            self.capacity, self.weigh = maxsize, _one
+        self.cache_name = f"_memoize_{func.__name__}"
+        update_wrapper(self, func)
+
+    def __set_name__(self, owner, name):
+        self.cache_name = f"_memoize_{name}"
 
     def __get__(self, obj, objtype=None):
         if obj is None:
             return self.target_func
-        return partial(self, obj)
+        cache = obj.__dict__.get(self.cache_name)
+        if cache is None:
+            cache = obj.__dict__.setdefault(
+                self.cache_name, LRUCache(self.capacity, self.weigh)
+            )
+        return _BoundMemoized(_call_memoized, self.target_func, cache, obj)
 
-    def __call__(self, *args, **kw):
-        target_self = args[0]
-        try:
-            cache = target_self.__cache
-        except AttributeError:
-            cache = target_self.__cache = {}
-        key = (self.target_func, args[1:], frozenset(kw.items()))
-        try:
-            res = cache[key]
-        except KeyError:
-            res = cache[key] = self.target_func(*args, **kw)
-        return res
+
+class _BoundMemoized(partial):
+    @property
+    def cache(self):
+        return self.args[1]
+
+
+def _call_memoized(target_func, cache, target_self, *args, **kw):
+    # the arguments tuple is the key, as in `functools.lru_cache`
+    key = args + (_KWARGS_MARK,) + tuple(kw.items()) if kw else args
+    res = cache.get(key, _MISSING)
+    if res is _MISSING:
+        res = target_func(target_self, *args, **kw)
+        cache.put(key, res)
+    return res
+
+
+def _one(value):
+    return 1
+
+
+class LRUCache:
+    """
+    A least recently used cache of at most `capacity` total weight.
+
+    The weight of a value is given by `weigh(value)`, `len` by default, so
+    that a cache of lists is bounded by the total length of its lists. Least
+    recently used values are evicted to make room for new ones and a value
+    that weighs more than `capacity` is not cached at all. A `capacity` of
+    `None` means that the cache is unbounded and a `capacity` of 0 disables
+    the cache.
+
+    The number of cache hits, misses and evictions are counted in `hits`,
+    `misses` and `evictions`.
+    """
+
+    def __init__(self, capacity, weigh=len):
+        self.capacity = capacity
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        """
+        Return the value cached for `key` and mark it as the most recently
+        used one, or return `default` if `key` is not cached.
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            if self.capacity is not None:
+                self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        """
+        Cache `value` for `key`, evicting the least recently used values if
+        the cache is over capacity.
+        """
+        if self.capacity == 0:
+            return
+        weight = self.weigh(value)
+        with self._lock:
+            if key in self._items:
+                self.weight -= self._items.pop(key)[1]
+            if self.capacity is not None and weight > self.capacity:
+                return
+            self._items[key] = (value, weight)
+            self.weight += weight
+            while self.capacity is not None and self.weight > self.capacity:
+                _, (_, evicted_weight) = self._items.popitem(last=False)
+                self.weight -= evicted_weight
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.weight = 0
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+@contextmanager
+def open_report(report):
+    """
+    Open the Cobertura report `report`, a path or a file object, and return a
+    context manager of a binary file object of its content. Reports that are
+    compressed with gzip or zstd, which are detected by their magic bytes, are
+    decompressed as they are read, zstd requiring the `zstandard` package.
+
+    A report path is memory-mapped (see `map_report`) and closed on exit while
+    a report file object is left open.
+    """
+    if not hasattr(report, "read"):
+        with map_report(report) as f:
+            yield f
+    elif isinstance(report.read(0), str):
+        yield Utf8Reader(report)
+    else:
+        yield _decompressed(report)
+
+
+@contextmanager
+def map_report(path):
+    """
+    Memory-map the report file at `path` and return a context manager of a
+    binary file object reading from the mapping, decompressed if the report is
+    compressed. The parser then reads the pages of the file straight from the
+    page cache instead of copying them through a buffered file first.
+
+    An empty file cannot be mapped and is read as a regular file.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield f
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            yield _decompress(mapping, mapping[:4])
+
+
+def _decompressed(fileobj):
+    fileobj, magic = _peek(fileobj, 4)
+    return _decompress(fileobj, magic)
+
+
+def _decompress(fileobj, magic):
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if magic == ZSTD_MAGIC:
+        if _optional_module("zstandard", "zstandard") is None:
+            raise ImportError(
+                "The zstandard package is required to read zstd compressed "
+                "reports: pip install zstandard"
+            )
+        return zstandard.ZstdDecompressor().stream_reader(fileobj)
+    return fileobj
+
+
+def _peek(fileobj, size):
+    """
+    Return the tuple `(fileobj, head)` where `head` are the first `size` bytes
+    of the binary file object `fileobj` and `fileobj` is a file object that
+    still reads from the start of `fileobj`.
+    """
+    if hasattr(fileobj, "peek"):
+        return fileobj, fileobj.peek(size)[:size]
+    if fileobj.seekable():
+        position = fileobj.tell()
+        head = fileobj.read(size)
+        fileobj.seek(position)
+        return fileobj, head
+    head = fileobj.read(size)
+    return _PrefixedReader(head, fileobj), head
+
+
+class _PrefixedReader:
+    """
+    Read `prefix` and then the rest of the binary file object `fileobj`.
+    """
+
+    def __init__(self, prefix, fileobj):
+        self.prefix = prefix
+        self.fileobj = fileobj
+
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.fileobj.read(size)
+        if size < 0:
+            data, self.prefix = self.prefix + self.fileobj.read(), b""
+            return data
+        data, self.prefix = self.prefix[:size], self.prefix[size:]
+        if len(data) < size:
+            data += self.fileobj.read(size - len(data))
+        return data
+
+
+class Utf8Reader:
+    """
+    Wrap a text file object so that `lxml.etree.iterparse`, which only reads
+    bytes, can consume it chunk by chunk.
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def read(self, size=-1):
+        return self.fileobj.read(size).encode("utf-8")
 
 
 def colorize(text, color):
@@ -74,11 +328,78 @@ def green(text):
 
 
 LineStatus = Literal["hit", "miss", "partial"]
+# Compact integer codes of the line statuses, "hit" must remain 0.
+LINE_STATUSES: Tuple[LineStatus, ...] = ("hit", "miss", "partial")
+LINE_STATUS_CODES = {status: code for code, status in enumerate(LINE_STATUSES)}
 LineStatusTuple = Tuple[int, LineStatus]
 LineTupleWithStatusNone = Tuple[int, Union[LineStatus, None]]
 LineRangeWithStatusNone = Tuple[int, int, Union[LineStatus, None]]
 
 
+# The line statuses are handled by NumPy as their index in this tuple, 0
+# standing for `None`.
+_STATUSES_OR_NONE = (None,) + LINE_STATUSES
+_HIT_CODE = _STATUSES_OR_NONE.index("hit")
+
+# Files with fewer lines than this are handled in pure Python, where NumPy
+# would not pay for the conversion of the line arrays.
+NUMPY_MIN_LINES = 256
+
+
+def _status_arrays(numbers, statuses):
+    """
+    Return the NumPy arrays `(numbers, codes)` of the parallel arrays of line
+    numbers `numbers` and of line status codes `statuses` (see
+    `LINE_STATUS_CODES`), or `None` if NumPy is missing or if the arrays are
+    short.
+    """
+    if len(numbers) < NUMPY_MIN_LINES or _optional_module("np", "numpy") is None:
+        return None
+    codes = np.asarray(statuses, dtype=np.int8) + 1
+    return np.asarray(numbers, dtype=np.int64), codes
+
+
+def _rangify_arrays(numbers, codes):
+    """
+    Return the list of the `(range_start, range_end, status)` tuples of the
+    line numbers `numbers` and their status codes `codes`, see
+    `rangify_by_status`.
+    """
+    breaks = (np.diff(numbers) != 1) | (np.diff(codes) != 0)
+    starts = np.concatenate(([0], np.flatnonzero(breaks) + 1))
+    ends = np.concatenate((starts[1:] - 1, [len(numbers) - 1]))
+    return list(
+        zip(
+            numbers[starts].tolist(),
+            numbers[ends].tolist(),
+            map(_STATUSES_OR_NONE.__getitem__, codes[starts].tolist()),
+        )
+    )
+
+
+def _extrapolate_arrays(numbers, codes):
+    """
+    Return the arrays `(numbers, codes)` of the lines `numbers` with the
+    status codes `codes` and of the lines of the gaps between them, see
+    `extrapolate_coverage`.
+    """
+    prev_numbers = np.concatenate(([0], numbers[:-1]))
+    prev_codes = np.concatenate(([_HIT_CODE], codes[:-1])).astype(np.int8)
+    gaps = np.maximum(numbers - prev_numbers - 1, 0)
+    # the lines of a gap get the status of the lines around it if they agree
+    fills = np.where(codes == prev_codes, codes, 0).astype(np.int8)
+
+    # every line is emitted after the lines of the gap before it
+    counts = gaps + 1
+    ends = np.cumsum(counts) - 1
+    firsts = np.repeat(prev_numbers + 1 - (ends - gaps), counts)
+    out_numbers = np.arange(len(firsts), dtype=np.int64) + firsts
+    out_numbers[ends] = numbers
+    out_codes = np.repeat(fills, counts)
+    out_codes[ends] = codes
+    return out_numbers, out_codes
+
+
 def rangify_by_status(line_statuses: List[LineTupleWithStatusNone]):
     """
     Returns a list of range tuples that represent continuous segments by status,
@@ -106,10 +427,16 @@ def rangify_by_status(line_statuses: List[LineTupleWithStatusNone]):
 
 def stringify(line_statuses):
     """Assumes the list is sorted."""
-    rangified_list = rangify_by_status(line_statuses)
+    return stringify_ranges(rangify_by_status(line_statuses))
+
 
+def stringify_ranges(ranges):
+    """
+    Return the string of the ranges `(range_start, range_end, status)` of
+    `ranges`, see `stringify`.
+    """
     stringified_list = []
-    for line_start, line_stop, status in rangified_list:
+    for line_start, line_stop, status in ranges:
         prefix = "~" if status == "partial" else ""
         if line_start == line_stop:
             stringified = f"{prefix}{line_start}"
@@ -144,7 +471,6 @@ def extrapolate_coverage(lines_w_status):
         (8, "miss"),
         (9, "miss"),
     ]
-
     """
     lines: List[LineTupleWithStatusNone] = []
 
@@ -164,43 +490,312 @@ def extrapolate_coverage(lines_w_status):
     return lines
 
 
+def extrapolate_missed_lines(numbers, statuses):
+    """
+    Return the tuples `(lineno, status)` of the lines of
+    `extrapolate_coverage()` whose status is "miss" or "partial", given the
+    parallel arrays of line numbers `numbers` and of line status codes
+    `statuses` (see `LINE_STATUS_CODES`).
+
+    Long arrays are extrapolated in bulk with NumPy when it is installed.
+    """
+    arrays = _status_arrays(numbers, statuses)
+    if arrays is None:
+        return [
+            (lineno, status)
+            for lineno, status in extrapolate_coverage(
+                _line_statuses(numbers, statuses)
+            )
+            if (status == "miss" or status == "partial")
+        ]
+
+    numbers, codes = _extrapolate_arrays(*arrays)
+    missed = codes > _HIT_CODE
+    return list(
+        zip(
+            numbers[missed].tolist(),
+            map(_STATUSES_OR_NONE.__getitem__, codes[missed].tolist()),
+        )
+    )
+
+
+def extrapolate_missed_ranges(numbers, statuses):
+    """
+    Return `rangify_by_status(extrapolate_missed_lines(numbers, statuses))`.
+    With NumPy, the ranges are computed in bulk without building a tuple per
+    missed line.
+    """
+    arrays = _status_arrays(numbers, statuses)
+    if arrays is None:
+        return rangify_by_status(extrapolate_missed_lines(numbers, statuses))
+
+    numbers, codes = _extrapolate_arrays(*arrays)
+    missed = codes > _HIT_CODE
+    numbers, codes = numbers[missed], codes[missed]
+    if not len(numbers):
+        return []
+    return _rangify_arrays(numbers, codes)
+
+
+def _line_statuses(numbers, statuses):
+    return list(zip(numbers, map(LINE_STATUSES.__getitem__, statuses)))
+
+
 def reconcile_lines(lines1, lines2):
     """
     Return a dict `{lineno1: lineno2}` which reconciles line numbers `lineno1`
     of list `lines1` to line numbers `lineno2` of list `lines2`. Only lines
     that are common in both sets are present in the dict, lines unique to one
     of the sets are omitted.
+
+    Lines are compared as integer ids and matched with the patience diff
+    algorithm: lines occurring exactly once on both sides anchor the diff and
+    the gaps between anchors are diffed recursively. Gaps without any such
+    line are diffed with Myers' algorithm, see `MYERS_MAX_COST`.
+    """
+    line_ids: Dict[str, int] = {}
+    a = [line_ids.setdefault(line, len(line_ids)) for line in lines1]
+    b = [line_ids.setdefault(line, len(line_ids)) for line in lines2]
+
+    return {i + 1: j + 1 for i, j in _match_lines(a, b)}
+
+
+# Myers' algorithm takes O(ND) time to diff regions of N lines that need D
+# edits. Past this many edits from each end of a region, the search stops and
+# splits the region at the furthest point reached from its start: the matches
+# found are then no longer guaranteed to be a longest common subsequence, but
+# regions with many edits and no unique lines are diffed in about linear time.
+MYERS_MAX_COST = 256
+
+
+def _match_lines(a, b):
     """
-    differ = difflib.Differ()
-    diff = differ.compare(lines1, lines2)
+    Return the list of index pairs `(i, j)`, in increasing order, of the
+    items matched between the sequences `a` and `b` (`a[i] == b[j]`).
+    """
+    matches = []
+    # Regions `(a_lo, a_hi, b_lo, b_hi)` left to diff, and `(i, j)` matches
+    # found along the way, processed in order.
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        item = stack.pop()
+        if len(item) == 2:
+            matches.append(item)
+            continue
+
+        a_lo, a_hi, b_lo, b_hi = item
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            matches.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            stack.append((a_hi, b_hi))
+
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        anchors = _patience_anchors(a, b, a_lo, a_hi, b_lo, b_hi)
+        if not anchors:
+            stack.extend(reversed(_myers_matches(a, b, a_lo, a_hi, b_lo, b_hi)))
+            continue
+
+        # Regions between anchors, pushed in reverse to be processed in order
+        anchors.append((a_hi, b_hi))
+        todo = []
+        for i, j in anchors:
+            todo.append((a_lo, i, b_lo, j))
+            todo.append((i, j))
+            a_lo, b_lo = i + 1, j + 1
+        todo.pop()  # (a_hi, b_hi) is not a match
+        stack.extend(reversed(todo))
+
+    return matches
+
+
+def _patience_anchors(a, b, a_lo, a_hi, b_lo, b_hi):
+    """
+    Return the longest increasing sequence of index pairs `(i, j)` of the
+    items that occur exactly once in both `a[a_lo:a_hi]` and `b[b_lo:b_hi]`.
+    """
+    counts: Dict[int, List[int]] = {}
+    for i in range(a_lo, a_hi):
+        entry = counts.get(a[i])
+        if entry is None:
+            counts[a[i]] = [1, i, 0, 0]
+        else:
+            entry[0] += 1
+    for j in range(b_lo, b_hi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[2] += 1
+            entry[3] = j
+
+    # Unique common items in the order of `b`, with their index in `a`
+    pairs = sorted(
+        (j, i)
+        for count_a, i, count_b, j in counts.values()
+        if count_a == 1 and count_b == 1
+    )
+    if not pairs:
+        return []
+
+    # Patience sorting of the indexes in `a` to find their longest increasing
+    # subsequence.
+    pile_tops: List[int] = []
+    pile_tops_pairs = []
+    backlinks = []
+    for j, i in pairs:
+        pile = bisect.bisect_left(pile_tops, i)
+        backlinks.append(pile_tops_pairs[pile - 1] if pile else None)
+        if pile == len(pile_tops):
+            pile_tops.append(i)
+            pile_tops_pairs.append(len(backlinks) - 1)
+        else:
+            pile_tops[pile] = i
+            pile_tops_pairs[pile] = len(backlinks) - 1
 
-    SAME = "  "
-    ADDED = "+ "
-    REMOVED = "- "
-    INFO = "? "
+    anchors = []
+    index = pile_tops_pairs[-1]
+    while index is not None:
+        j, i = pairs[index]
+        anchors.append((i, j))
+        index = backlinks[index]
+    anchors.reverse()
+    return anchors
 
-    lineno_map = {}  # {lineno1: lineno2, ...}
-    lineno1_offset = 0
-    lineno2 = 1
 
-    for diffline in diff:
-        if diffline.startswith(INFO):
+def _myers_matches(a, b, a_lo, a_hi, b_lo, b_hi):
+    """
+    Return the index pairs `(i, j)` of a longest common subsequence of
+    `a[a_lo:a_hi]` and `b[b_lo:b_hi]` using the linear space variant of
+    Myers' O(ND) algorithm: the regions are split in two around a point of an
+    optimal edit path (see `_myers_split()`) until they have a common prefix
+    or suffix, or no common item left.
+    """
+    matches = []
+    # Regions left to diff and matches found along the way, processed in
+    # order, like in `_match_lines()`.
+    stack = [(a_lo, a_hi, b_lo, b_hi)]
+    while stack:
+        item = stack.pop()
+        if len(item) == 2:
+            matches.append(item)
             continue
 
-        if diffline.startswith(SAME):
-            lineno1 = lineno2 + lineno1_offset
-            lineno_map[lineno1] = lineno2
+        a_lo, a_hi, b_lo, b_hi = item
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            matches.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
 
-        elif diffline.startswith(ADDED):
-            lineno1_offset -= 1
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            stack.append((a_hi, b_hi))
 
-        elif diffline.startswith(REMOVED):
-            lineno1_offset += 1
+        if a_lo == a_hi or b_lo == b_hi:
             continue
 
-        lineno2 += 1
+        split = _myers_split(a, b, a_lo, a_hi, b_lo, b_hi)
+        if split is not None:
+            i, j = split
+            stack.append((i, a_hi, j, b_hi))
+            stack.append((a_lo, i, b_lo, j))
+
+    return matches
+
 
-    return lineno_map
+def _myers_split(a, b, a_lo, a_hi, b_lo, b_hi):
+    """
+    Return the point `(i, j)` where an optimal edit path of `a[a_lo:a_hi]`
+    into `b[b_lo:b_hi]` crosses the middle of the edits, or `None` if the
+    regions have no item in common.
+
+    The path is searched from both ends at once, keeping only the furthest
+    reaching points of the current step on each diagonal, so the memory used
+    is linear in the size of the regions. The regions must not start or end
+    with a common item.
+
+    The search gives up after `MYERS_MAX_COST` edits from each end and returns
+    the furthest point reached from the start instead.
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    max_d = (n + m + 1) // 2
+    offset = max_d
+    size = 2 * max_d + 1
+    # Furthest x reached on each diagonal k (at `offset + k`), from the start
+    # in `forward` and from the end, counted backward, in `backward`.
+    forward = [-1] * size
+    backward = [-1] * size
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+    delta = n - m
+    # The paths meet in the forward search when delta is odd
+    odd = delta % 2 != 0
+    # Diagonals that went past the edges of the regions are not searched again
+    k1_start = k1_end = k2_start = k2_end = 0
+    # Furthest point reached from the start, as `(x + y, x, y)`
+    best = (0, 0, 0)
+    for d in range(max_d):
+        if d > MYERS_MAX_COST and best[0]:
+            _, x1, y1 = best
+            return a_lo + x1, b_lo + y1
+
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_offset = offset + k1
+            if k1 == -d or (
+                k1 != d and forward[k1_offset - 1] < forward[k1_offset + 1]
+            ):
+                x1 = forward[k1_offset + 1]
+            else:
+                x1 = forward[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[a_lo + x1] == b[b_lo + y1]:
+                x1 += 1
+                y1 += 1
+            forward[k1_offset] = x1
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            else:
+                if x1 + y1 > best[0]:
+                    best = (x1 + y1, x1, y1)
+                if odd:
+                    k2_offset = offset + delta - k1
+                    if 0 <= k2_offset < size and backward[k2_offset] != -1:
+                        if x1 >= n - backward[k2_offset]:
+                            return a_lo + x1, b_lo + y1
+
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_offset = offset + k2
+            if k2 == -d or (
+                k2 != d and backward[k2_offset - 1] < backward[k2_offset + 1]
+            ):
+                x2 = backward[k2_offset + 1]
+            else:
+                x2 = backward[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[a_hi - 1 - x2] == b[b_hi - 1 - y2]:
+                x2 += 1
+                y2 += 1
+            backward[k2_offset] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not odd:
+                k1_offset = offset + delta - k2
+                if 0 <= k1_offset < size and forward[k1_offset] != -1:
+                    x1 = forward[k1_offset]
+                    if x1 >= n - x2:
+                        return a_lo + x1, b_lo + offset + x1 - k1_offset
+
+    return None
 
 
 def hunkify_lines(lines, context=3):
@@ -209,23 +804,25 @@ def hunkify_lines(lines, context=3):
     context lines can be control with `context` which will return line hunks
     surrounded with `context` lines before and after the code change.
     """
-    # Find contiguous line changes
-    ranges = []
-    range_start = None
-    for i, line in enumerate(lines):
-        if line.status is not None:
-            if range_start is None:
-                range_start = i
-                continue
-        elif range_start is not None:
-            range_stop = i
-            ranges.append((range_start, range_stop))
-            range_start = None
+    # Find contiguous line changes. A lazy file source (see
+    # `pycobertura.cobertura.FileSource`) lists its changed lines without
+    # building the others.
+    changed_lines = getattr(lines, "changed_lines", None)
+    if changed_lines is not None:
+        changed = (
+            line.number - 1 for line in changed_lines() if line.status is not None
+        )
     else:
-        # Append the last range
-        if range_start is not None:
-            range_stop = i
-            ranges.append((range_start, range_stop))
+        changed = (i for i, line in enumerate(lines) if line.status is not None)
+    ranges = []
+    for i in changed:
+        if ranges and ranges[-1][1] == i:
+            ranges[-1][1] = i + 1
+        else:
+            ranges.append([i, i + 1])
+    if ranges and ranges[-1][1] == len(lines):
+        # the last range stops before the last line
+        ranges[-1][1] -= 1
 
     # add context
     ranges_w_context = []
@@ -268,21 +865,88 @@ def get_non_empty_non_commented_lines_from_file_in_ascii(file_path, comment_char
         return [res for res in result if res != ""]
 
 
+class IgnoreFilter:
+    """
+    Compiled filter of the filenames to ignore, see `compile_ignore_filter`.
+
+    Calling the filter with a list of filenames returns the filenames that are
+    not ignored, in the same order.
+    """
+
+    __slots__ = ("pattern", "normcase")
+
+    def __init__(self, pattern, normcase=False):
+        self.pattern = pattern
+        # glob patterns are matched as by `fnmatch.filter`
+        self.normcase = normcase
+
+    def __call__(self, filenames):
+        match = self.pattern.match
+        if self.normcase:
+            normcase = os.path.normcase
+            return [fname for fname in filenames if not match(normcase(fname))]
+        return [fname for fname in filenames if not match(fname)]
+
+    def ignores(self, filename):
+        """
+        Return whether the file `filename` is ignored.
+        """
+        if self.normcase:
+            filename = os.path.normcase(filename)
+        return self.pattern.match(filename) is not None
+
+    def __repr__(self):
+        return f"IgnoreFilter({self.pattern.pattern!r})"
+
+
+def compile_ignore_filter(ignore_regex, comment_character="#"):
+    """
+    Return the `IgnoreFilter` of `ignore_regex`, either a regex matched at the
+    start of the filenames or the path to a file of glob patterns, one per
+    line, where the lines starting with `comment_character` are ignored.
+
+    The glob patterns are combined into a single regex. An ignore file is
+    only read again when its modification time or size change, and the same
+    `IgnoreFilter` is returned for the same regex, so that it can be reused
+    across reports. An `IgnoreFilter` is returned as is.
+    """
+    if isinstance(ignore_regex, IgnoreFilter):
+        return ignore_regex
+    try:
+        stat = os.stat(ignore_regex)
+    except (OSError, ValueError):
+        stat = None
+    if stat is None or not S_ISREG(stat.st_mode):
+        return _regex_filter(ignore_regex)
+    return _glob_filter(ignore_regex, comment_character, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=32)
+def _glob_filter(path, comment_character, mtime_ns, size):
+    # `mtime_ns` and `size` are only part of the key, so that a changed
+    # ignore file is read again
+    ignore_patterns = get_non_empty_non_commented_lines_from_file_in_ascii(
+        path, comment_character
+    )
+    pattern = re.compile(
+        "|".join(
+            f"(?:{fnmatch.translate(os.path.normcase(igp))})" for igp in ignore_patterns
+        )
+        # an empty ignore file ignores nothing
+        or "(?!)"
+    )
+    return IgnoreFilter(pattern, True)
+
+
+@lru_cache(maxsize=32)
+def _regex_filter(ignore_regex):
+    return IgnoreFilter(re.compile(ignore_regex))
+
+
 def get_filenames_that_do_not_match_regex(
     filenames, regex_param, comment_character="#"
 ):
-    if os.path.isfile(regex_param):
-        ignore_patterns = get_non_empty_non_commented_lines_from_file_in_ascii(
-            regex_param, comment_character
-        )
-        remove_filenames = [
-            filename
-            for igp in ignore_patterns
-            for filename in fnmatch.filter(filenames, igp)
-        ]
-    else:
-        remove_filenames = list(filter(re.compile(regex_param).match, filenames))
-    return [fname for fname in filenames if fname not in remove_filenames]
+    return compile_ignore_filter(regex_param, comment_character)(filenames)
 
 
 def get_line_status(line):
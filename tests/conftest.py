@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture(scope="session")
+def user_cache_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("cache")
+
+
+@pytest.fixture(autouse=True)
+def isolated_user_cache(user_cache_dir, monkeypatch):
+    """
+    Keep the compiled HTML templates out of the user cache directory.
+    """
+    from pycobertura.reporters import get_template_env
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(user_cache_dir))
+    monkeypatch.setenv("LOCALAPPDATA", str(user_cache_dir))
+    get_template_env.cache_clear()
+    yield
+    get_template_env.cache_clear()
@@ -0,0 +1,9 @@
+def foo():
+    return 'foo'
+
+
+# The comments below only document foo(),
+# editing them does not change the
+# coverage of foo().
+#
+# See the tests.
@@ -0,0 +1,10 @@
+def foo():
+    return 'bar'
+
+
+# The comments below only document foo(),
+# editing them leaves the
+# coverage of foo() as it is.
+
+#
+# See the tests.
@@ -1102,6 +1102,17 @@ def test_diff__changes_uncovered_but_with_better_coverage_exit_status():
     assert result.exit_code == ExitCodes.NOT_ALL_CHANGES_COVERED
 
 
+def test_diff__comment_only_edit_has_exit_status_of_zero():
+    from pycobertura.cli import diff, ExitCodes
+
+    runner = CliRunner()
+    result = runner.invoke(diff, [
+        'tests/dummy.commentedit1/coverage.xml',
+        'tests/dummy.commentedit2/coverage.xml',  # only comments are edited
+    ], catch_exceptions=False)
+    assert result.exit_code == ExitCodes.OK
+
+
 def test_diff__line_status():
     from pycobertura.cli import diff
 
@@ -1255,3 +1266,148 @@ def test_diff__format_yaml__with_ignore_regex():
 
     # Verify total is present
     assert 'Filename: TOTAL' in result.output
+
+
+def test_show__cache_dir(tmp_path):
+    from pycobertura.cli import show
+
+    runner = CliRunner()
+    for _ in range(2):
+        result = runner.invoke(show, [
+            'tests/dummy.original.xml',
+            '--cache-dir', str(tmp_path),
+        ], catch_exceptions=False)
+        assert result.output == """\
+Filename             Stmts    Miss  Cover    Missing
+-----------------  -------  ------  -------  ---------
+dummy/__init__.py        0       0  100.00%
+dummy/dummy.py           4       2  50.00%   2, 5
+TOTAL                    4       2  50.00%
+"""
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+@pytest.mark.parametrize("format", ["text", "html"])
+def test_diff__jobs(format):
+    from pycobertura.cli import diff
+
+    runner = CliRunner()
+    args = [
+        '--format', format,
+        'tests/dummy.source1/coverage.xml',
+        'tests/dummy.source2/coverage.xml',
+    ]
+    serial = runner.invoke(diff, args, catch_exceptions=False)
+    parallel = runner.invoke(diff, ['--jobs', '2'] + args, catch_exceptions=False)
+    assert parallel.output == serial.output
+    assert parallel.exit_code == serial.exit_code
+
+
+@pytest.mark.parametrize("args, exit_code", [
+    (['tests/dummy.source1/coverage.xml', 'tests/dummy.source1/coverage.xml'],
+     ExitCodes.OK),
+    (['tests/dummy.original.xml', 'tests/dummy.original-full-cov.xml', '--no-source'],
+     ExitCodes.OK),
+    (['tests/dummy.source1/coverage.xml', 'tests/dummy.source2/coverage.xml'],
+     ExitCodes.COVERAGE_WORSENED),
+    (['tests/dummy.zeroexit1/coverage.xml', 'tests/dummy.zeroexit2/coverage.xml'],
+     ExitCodes.NOT_ALL_CHANGES_COVERED),
+    (['tests/dummy.commentedit1/coverage.xml', 'tests/dummy.commentedit2/coverage.xml'],
+     ExitCodes.OK),
+])
+def test_diff__exit_code_only(args, exit_code):
+    from pycobertura.cli import diff
+
+    runner = CliRunner()
+    result = runner.invoke(diff, ['--exit-code-only'] + args, catch_exceptions=False)
+    assert result.output == ''
+    assert result.exit_code == exit_code
+
+
+@pytest.mark.parametrize("fail_threshold, exit_code", ((1000, ExitCodes.OK), (1, ExitCodes.TOTAL_MISSES_ABOVE_THRESHOLD)))
+def test_show__fail_threshold__exit_code_only(fail_threshold, exit_code):
+    from pycobertura.cli import show
+
+    runner = CliRunner()
+    result = runner.invoke(show, [
+        'tests/dummy.original.xml',
+        f'--fail-threshold={fail_threshold}',
+        '--exit-code-only',
+    ], catch_exceptions=False)
+    assert result.output == ''
+    assert result.exit_code == exit_code
+
+
+def test_show__exit_code_only__requires_fail_threshold():
+    from pycobertura.cli import show
+
+    runner = CliRunner()
+    result = runner.invoke(show, [
+        'tests/dummy.original.xml',
+        '--exit-code-only',
+    ], catch_exceptions=False)
+    assert result.exit_code == 2
+    assert '--exit-code-only requires --fail-threshold.' in result.output
+
+
+def test_merge(tmp_path):
+    from pycobertura.cli import merge
+    from pycobertura.cobertura import Cobertura
+
+    output = tmp_path / 'merged.xml'
+    runner = CliRunner()
+    result = runner.invoke(merge, [
+        'tests/dummy.original.xml',
+        'tests/dummy.original-full-cov.xml',
+        '--output', str(output),
+    ], catch_exceptions=False)
+    assert result.exit_code == ExitCodes.OK
+    assert Cobertura(str(output)).total_misses() == 0
+
+
+def test_merge__requires_reports():
+    from pycobertura.cli import merge
+
+    runner = CliRunner()
+    result = runner.invoke(merge, [], catch_exceptions=False)
+    assert result.exit_code == 2
+
+
+def test_show__gzip_compressed_report(tmp_path):
+    import gzip
+    import shutil
+    from pycobertura.cli import show
+
+    report = tmp_path / 'coverage.xml.gz'
+    with open('tests/dummy.original.xml', 'rb') as f:
+        report.write_bytes(gzip.compress(f.read()))
+    shutil.copytree('tests/dummy/dummy', tmp_path / 'dummy')
+
+    runner = CliRunner()
+    result = runner.invoke(show, [str(report)], catch_exceptions=False)
+    assert result.output == """\
+Filename             Stmts    Miss  Cover    Missing
+-----------------  -------  ------  -------  ---------
+dummy/__init__.py        0       0  100.00%
+dummy/dummy.py           4       2  50.00%   2, 5
+TOTAL                    4       2  50.00%
+"""
+
+
+def test_cli__reporters_resolved_lazily():
+    import subprocess
+    import sys
+    from pycobertura.cli import delta_reporters, reporters
+    from pycobertura.reporters import HtmlReporter, TextReporterDelta
+
+    assert reporters['html'] is HtmlReporter
+    assert delta_reporters['text'] is TextReporterDelta
+    assert list(reporters) == ['html', 'text', 'csv', 'markdown', 'json', 'yaml', 'github-annotation']
+
+    heavy_modules = ('jinja2', 'tabulate', 'ruamel.yaml', 'numpy', 'zstandard')
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys, pycobertura.cli; '
+        f'print([m for m in {heavy_modules!r} if m in sys.modules])',
+    ], universal_newlines=True)
+    assert output.strip() == '[]'
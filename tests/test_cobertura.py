@@ -41,6 +41,66 @@ def test_invalid_coverage_report():
     pytest.raises(Cobertura.InvalidCoverageReport, Cobertura, xml_path)
 
 
+@pytest.mark.parametrize('streaming', [False, True])
+def test_invalid_coverage_report__path_is_not_parsed_as_xml(streaming):
+    from pycobertura import Cobertura
+
+    with mock.patch('pycobertura.cobertura.ET.fromstring') as mock_fromstring:
+        with pytest.raises(Cobertura.InvalidCoverageReport) as excinfo:
+            Cobertura('non-existent.xml', streaming=streaming)
+
+    assert not mock_fromstring.called
+    assert 'as a filename' in str(excinfo.value)
+    assert 'No such file' in str(excinfo.value)
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_invalid_coverage_report__string_is_not_opened(streaming):
+    from pycobertura import Cobertura
+
+    with mock.patch('pycobertura.utils.open') as mock_open:
+        with pytest.raises(Cobertura.InvalidCoverageReport) as excinfo:
+            Cobertura('<coverage><packages>', streaming=streaming)
+
+    assert not mock_open.called
+    assert 'as an XML Cobertura string' in str(excinfo.value)
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_parse_path__bytes_and_path_like(streaming, tmp_path):
+    import os
+    import pathlib
+    from pycobertura import Cobertura
+
+    expected = Cobertura('tests/cobertura.xml').files()
+    assert Cobertura(b'tests/cobertura.xml', streaming=streaming).files() == expected
+    assert Cobertura(pathlib.Path('tests/cobertura.xml'), streaming=streaming).files() == expected
+    with open('tests/cobertura.xml', 'rb') as f:
+        assert Cobertura(f.read(), streaming=streaming).files() == expected
+    cached = Cobertura(os.fsencode('tests/cobertura.xml'), cache_dir=str(tmp_path))
+    assert cached.files() == expected
+
+
+def test_parse_path__memory_mapped():
+    import mmap
+    from pycobertura import Cobertura
+
+    with mock.patch('pycobertura.utils.mmap.mmap', wraps=mmap.mmap) as mock_mmap:
+        cobertura = Cobertura('tests/cobertura.xml')
+
+    assert mock_mmap.call_count == 1
+    assert cobertura.files() == Cobertura(open('tests/cobertura.xml')).files()
+
+
+def test_parse_path__empty_file(tmp_path):
+    from pycobertura import Cobertura
+
+    path = tmp_path / 'coverage.xml'
+    path.write_bytes(b'')
+    with pytest.raises(Cobertura.InvalidCoverageReport):
+        Cobertura(str(path))
+
+
 def test_version():
     cobertura = make_cobertura()
     assert cobertura.version == '1.9'
@@ -359,3 +419,275 @@ def test_class_source_lines__raises_when_no_filesystem():
             cobertura.source_lines,
             filename
         )
+
+
+def test_class_file_source__cache_is_bounded():
+    from pycobertura.cobertura import _source_size
+
+    cobertura = make_cobertura('tests/dummy.source1/coverage.xml')
+    filenames = cobertura.files()
+    sizes = [_source_size(cobertura.file_source(filename)) for filename in filenames]
+    assert cobertura.file_source.cache.weight == sum(sizes)
+
+    cache = cobertura.file_source.cache
+    cache.capacity = max(sizes)
+    cache.clear()
+    for filename in filenames:
+        cobertura.file_source(filename)
+    assert len(cache) < len(filenames)
+    assert cache.weight <= cache.capacity
+    assert cache.misses == 2 * len(filenames)
+
+
+@pytest.mark.parametrize("report", [
+    "tests/cobertura.xml",
+    "tests/cobertura-generated-by-istanbul-from-coffeescript.xml",
+    "tests/dummy.source1/coverage.xml",
+    "tests/dummy.with-branch-condition/coverage.xml",
+])
+def test_streaming__same_results_as_tree(report):
+    from pycobertura import Cobertura
+
+    cobertura = Cobertura(report)
+    streamed = Cobertura(report, streaming=True)
+
+    assert streamed.xml is None
+    assert streamed.version == cobertura.version
+    assert streamed.line_rate() == cobertura.line_rate()
+    assert streamed.branch_rate() == cobertura.branch_rate()
+    assert streamed.packages() == cobertura.packages()
+    assert streamed.files() == cobertura.files()
+    assert streamed.total_statements() == cobertura.total_statements()
+    assert streamed.total_misses() == cobertura.total_misses()
+    assert streamed.total_hits() == cobertura.total_hits()
+    for filename in cobertura.files():
+        assert streamed.line_rate(filename) == cobertura.line_rate(filename)
+        assert streamed.branch_rate(filename) == cobertura.branch_rate(filename)
+        assert streamed.line_statuses(filename) == cobertura.line_statuses(filename)
+        assert streamed.missed_statements(filename) == \
+            cobertura.missed_statements(filename)
+        assert streamed.hit_statements(filename) == \
+            cobertura.hit_statements(filename)
+        assert streamed.missed_lines(filename) == cobertura.missed_lines(filename)
+
+
+def test_streaming__parse_file_object_and_string():
+    from pycobertura import Cobertura
+
+    xml_path = 'tests/cobertura.xml'
+    with open(xml_path) as f:
+        from_file_object = Cobertura(f, streaming=True)
+    with open(xml_path) as f:
+        from_string = Cobertura(f.read(), streaming=True)
+
+    assert from_file_object.files() == from_string.files()
+    assert from_file_object.total_misses() == from_string.total_misses() == 6
+
+
+def test_streaming__invalid_coverage_report():
+    from pycobertura import Cobertura
+
+    pytest.raises(
+        Cobertura.InvalidCoverageReport, Cobertura, 'non-existent.xml', streaming=True
+    )
+
+
+def test_totals__with_ignore_regex():
+    cobertura = make_cobertura()
+    ignore_regex = "^search/Linear"
+
+    assert cobertura.total_statements(ignore_regex=ignore_regex) == 27
+    assert cobertura.total_misses(ignore_regex=ignore_regex) == 2
+    assert cobertura.total_hits(ignore_regex=ignore_regex) == 25
+    # the report totals are left untouched
+    assert cobertura.total_statements() == 34
+
+
+def test_has_file():
+    cobertura = make_cobertura()
+
+    assert cobertura.has_file('search/BinarySearch.java')
+    assert not cobertura.has_file('search/NonExistent.java')
+
+
+def test_cache_dir__loads_snapshot(tmp_path):
+    from pycobertura import Cobertura
+
+    report = 'tests/cobertura.xml'
+    cobertura = Cobertura(report, cache_dir=str(tmp_path))
+    assert cobertura.xml is not None
+    assert len(list(tmp_path.iterdir())) == 1
+
+    with mock.patch.object(Cobertura, '_load') as mock_load:
+        cached = Cobertura(report, cache_dir=str(tmp_path))
+
+    mock_load.assert_not_called()
+    assert cached.xml is None
+    assert cached.version == cobertura.version
+    assert cached.line_rate() == cobertura.line_rate()
+    assert cached.branch_rate() == cobertura.branch_rate()
+    assert cached.packages() == cobertura.packages()
+    assert cached.files() == cobertura.files()
+    for filename in cobertura.files():
+        assert cached.line_rate(filename) == cobertura.line_rate(filename)
+        assert cached.line_statuses(filename) == cobertura.line_statuses(filename)
+        assert cached.total_misses(filename) == cobertura.total_misses(filename)
+
+
+def test_cache_dir__report_changed(tmp_path):
+    import shutil
+    from pycobertura import Cobertura
+
+    report = tmp_path / 'coverage.xml'
+    shutil.copy('tests/dummy.source1/coverage.xml', report)
+    assert Cobertura(str(report), cache_dir=str(tmp_path)).total_misses() == 7
+
+    shutil.copy('tests/dummy.source2/coverage.xml', report)
+    assert Cobertura(str(report), cache_dir=str(tmp_path)).total_misses() == 3
+
+
+@pytest.mark.parametrize("report", [
+    'tests/cobertura.xml',
+    'tests/dummy.original.xml',
+    'tests/cobertura-generated-by-istanbul-from-coffeescript.xml',
+])
+def test_total_misses_exceed(report):
+    from pycobertura.cobertura import Cobertura, total_misses_exceed
+
+    total_misses = Cobertura(report).total_misses()
+    assert total_misses_exceed(report, total_misses - 1) is True
+    assert total_misses_exceed(report, total_misses) is False
+    with open(report) as f:
+        assert total_misses_exceed(f, total_misses - 1) is True
+
+
+def test_total_misses_exceed__root_attributes_lower_bound():
+    import io
+    from pycobertura.cobertura import total_misses_exceed
+
+    report = (
+        b'<coverage lines-valid="100" lines-covered="10"><packages>'
+        b'<package name="p"><classes><class filename="a.py"><lines>'
+        b'<line number="1" hits="0"/></lines></class></classes></package>'
+        b'</packages></coverage>'
+    )
+    # the attributes alone are enough to exceed the threshold
+    assert total_misses_exceed(io.BytesIO(report), 50) is True
+    # but not this one, the lines are counted
+    assert total_misses_exceed(io.BytesIO(report), 90) is False
+
+
+def test_total_misses_exceed__root_attributes_not_trusted():
+    import io
+    from pycobertura.cobertura import total_misses_exceed
+
+    report = (
+        b'<coverage lines-valid="%s" lines-covered="%s"><packages>'
+        b'<package name="p"><classes><class filename="a.py"><lines>'
+        b'<line number="1" hits="0"/></lines></class>'
+        b'<class filename="b.py"><lines><line number="1" hits="0"/></lines>'
+        b'</class></classes></package></packages></coverage>'
+    )
+    # inconsistent attributes, the lines are counted
+    assert total_misses_exceed(io.BytesIO(report % (b"10", b"20")), 1) is True
+    assert total_misses_exceed(io.BytesIO(report % (b"-90", b"10")), 2) is False
+    # the attributes do not account for the ignored files
+    mismatched = io.BytesIO(report % (b"100", b"0"))
+    assert total_misses_exceed(mismatched, 1, ignore_regex="^b") is False
+    mismatched.seek(0)
+    assert total_misses_exceed(mismatched, 0, ignore_regex="^b") is True
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_load_many(jobs):
+    from pycobertura.cobertura import Cobertura, load_many
+    from pycobertura.filesystem import DirectoryFileSystem
+    from pycobertura.reporters import TextReporter
+
+    reports = [
+        'tests/cobertura.xml',
+        'tests/dummy.original.xml',
+        'tests/dummy.source1/coverage.xml',
+    ]
+    filesystem = DirectoryFileSystem('tests/dummy.source1')
+    coberturas = load_many(reports, jobs=jobs, filesystem=filesystem)
+
+    assert [cobertura.report for cobertura in coberturas] == reports
+    for report, cobertura in zip(reports, coberturas):
+        expected = Cobertura(report, filesystem=filesystem)
+        assert cobertura.filesystem is filesystem
+        assert cobertura.files() == expected.files()
+        assert cobertura.line_rate() == expected.line_rate()
+        assert TextReporter(cobertura).generate() == (
+            TextReporter(expected).generate()
+        )
+
+
+def _compress(tmp_path, report, compression):
+    with open(report, 'rb') as f:
+        content = f.read()
+    if compression == 'gz':
+        import gzip
+        compressed = gzip.compress(content)
+    else:
+        zstandard = pytest.importorskip('zstandard')
+        compressed = zstandard.ZstdCompressor().compress(content)
+    path = tmp_path / f'coverage.xml.{compression}'
+    path.write_bytes(compressed)
+    return str(path)
+
+
+@pytest.mark.parametrize('compression', ['gz', 'zst'])
+@pytest.mark.parametrize('streaming', [False, True])
+def test_parse_compressed_report(tmp_path, compression, streaming):
+    import io
+    from pycobertura.cobertura import Cobertura, total_misses_exceed
+
+    report = 'tests/cobertura.xml'
+    path = _compress(tmp_path, report, compression)
+    expected = Cobertura(report)
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    for source in (path, io.BytesIO(content), content):
+        cobertura = Cobertura(source, streaming=streaming)
+        assert cobertura.files() == expected.files()
+        for filename in expected.files():
+            assert cobertura.line_statuses(filename) == (
+                expected.line_statuses(filename)
+            )
+
+    assert total_misses_exceed(path, expected.total_misses() - 1) is True
+    assert total_misses_exceed(path, expected.total_misses()) is False
+
+
+def test_parse_zstd_report__zstandard_not_installed(tmp_path):
+    import mock
+    from pycobertura.cobertura import Cobertura
+
+    path = _compress(tmp_path, 'tests/cobertura.xml', 'zst')
+    with mock.patch('pycobertura.utils.zstandard', None):
+        with pytest.raises(Cobertura.InvalidCoverageReport) as excinfo:
+            Cobertura(path, streaming=True)
+    assert 'zstandard package is required' in str(excinfo.value)
+
+
+def test_open_report__unseekable_file_object():
+    import gzip
+    import io
+    from pycobertura.utils import open_report
+
+    class Unseekable:
+        def __init__(self, content):
+            self.content = io.BytesIO(content)
+
+        def read(self, size=-1):
+            return self.content.read(size)
+
+        def seekable(self):
+            return False
+
+    content = b'<coverage/>'
+    for data in (content, gzip.compress(content)):
+        with open_report(Unseekable(data)) as f:
+            assert f.read() == content
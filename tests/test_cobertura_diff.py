@@ -152,6 +152,23 @@ def test_diff__has_all_changes_covered__some_changed_code_is_still_uncovered():
     assert differ.has_all_changes_covered() is False
 
 
+def test_diff__has_all_changes_covered__comment_only_edit():
+    from pycobertura.cobertura import CoberturaDiff
+
+    cobertura1 = make_cobertura('tests/dummy.commentedit1/coverage.xml')
+    cobertura2 = make_cobertura('tests/dummy.commentedit2/coverage.xml')
+
+    # only the edit of line 2 is covered, the edited comments are not within
+    # its hunk
+    differ = CoberturaDiff(cobertura1, cobertura2)
+    assert differ.has_all_changes_covered() is True
+
+    differ = CoberturaDiff(cobertura1, cobertura2)
+    assert [line.number for line in differ.file_source_hunks('dummy/dummy.py')[0]] \
+        == [1, 2, 3, 4, 5]
+    assert differ.has_all_changes_covered() is True
+
+
 def test_diff__has_better_coverage():
     from pycobertura.cobertura import Cobertura, CoberturaDiff
 
@@ -178,3 +195,171 @@ def test_diff__mixed_filesystems():
 
     differ = CoberturaDiff(cobertura1, cobertura2)
     assert differ.has_all_changes_covered() is True
+
+
+def test_diff__unchanged_files_are_not_diffed():
+    import mock
+    from pycobertura.cobertura import CoberturaDiff, Line
+
+    cobertura1 = make_cobertura('tests/dummy.source1/coverage.xml')
+    cobertura2 = make_cobertura('tests/dummy.source1/coverage.xml')
+    differ = CoberturaDiff(cobertura1, cobertura2)
+
+    with mock.patch('pycobertura.cobertura.reconcile_lines') as mock_reconcile:
+        for filename in differ.files():
+            assert differ.is_unchanged(filename)
+            assert differ.file_source_hunks(filename) == []
+            assert differ.diff_missed_lines(filename) == []
+        assert differ.has_all_changes_covered() is True
+        assert differ.file_source('dummy/dummy2.py') == [
+            Line(1, 'def baz():\n', None, None),
+            Line(2, '    pass\n', None, None),
+        ]
+
+    mock_reconcile.assert_not_called()
+
+
+def test_diff__changed_files_are_diffed():
+    from pycobertura.cobertura import CoberturaDiff
+
+    cobertura1 = make_cobertura('tests/dummy.source1/coverage.xml')
+    cobertura2 = make_cobertura('tests/dummy.source2/coverage.xml')
+    differ = CoberturaDiff(cobertura1, cobertura2)
+
+    assert not differ.is_unchanged('dummy/dummy.py')
+    assert not differ.is_unchanged('dummy/dummy3.py')  # only in cobertura2
+
+
+def test_filesystem_fingerprint__matches_git_blob_id():
+    from pycobertura.filesystem import DirectoryFileSystem, ZipFileSystem
+
+    # `git hash-object tests/dummy/dummy/dummy.py`
+    blob_id = '84898417097344a70a955f92f3e5db74764aaca5'
+
+    fs = DirectoryFileSystem('tests/dummy')
+    assert fs.fingerprint('dummy/dummy.py') == blob_id
+    assert fs.fingerprint('dummy/non-existent.py') is None
+
+    fs = ZipFileSystem('tests/dummy/dummy.zip')
+    assert fs.fingerprint('dummy/dummy.py') == blob_id
+
+
+def test_diff__jobs__same_results_in_file_order():
+    from pycobertura.cobertura import CoberturaDiff
+
+    cobertura1 = make_cobertura('tests/dummy.source1/coverage.xml')
+    cobertura2 = make_cobertura('tests/dummy.source2/coverage.xml')
+    differ = CoberturaDiff(cobertura1, cobertura2)
+    parallel_differ = CoberturaDiff(cobertura1, cobertura2, jobs=2)
+
+    filenames = differ.files()
+    assert list(parallel_differ.iter_file_sources(filenames)) == [
+        (filename, differ.file_source(filename)) for filename in filenames
+    ]
+    assert list(parallel_differ.iter_file_source_hunks(filenames)) == [
+        (filename, differ.file_source_hunks(filename)) for filename in filenames
+    ]
+    assert list(parallel_differ.iter_diff_missed_lines(filenames)) == [
+        (filename, differ.diff_missed_lines(filename)) for filename in filenames
+    ]
+    assert (
+        parallel_differ.has_all_changes_covered() is differ.has_all_changes_covered()
+    )
+
+
+def test_diff__jobs__pools_started_once_and_not_forked():
+    from pycobertura.cobertura import CoberturaDiff
+
+    cobertura1 = make_cobertura('tests/dummy.source1/coverage.xml')
+    cobertura2 = make_cobertura('tests/dummy.source2/coverage.xml')
+    with CoberturaDiff(cobertura1, cobertura2, jobs=2, cache_lines=0) as differ:
+        filenames = differ.files()
+        list(differ.iter_file_sources(filenames))
+        readers, workers = differ._executors()
+        list(differ.iter_diff_missed_lines(filenames))
+        assert differ._executors() == (readers, workers)
+        assert workers._mp_context.get_start_method() != 'fork'
+
+    assert differ._workers is None
+    assert differ._readers is None
+
+
+def test_diff__file_source_is_computed_once():
+    import mock
+    from pycobertura.cobertura import CoberturaDiff
+    from pycobertura.utils import reconcile_lines
+
+    cobertura1 = make_cobertura('tests/dummy.source1/coverage.xml')
+    cobertura2 = make_cobertura('tests/dummy.source2/coverage.xml')
+
+    for cache_lines, calls_per_file in ((None, 1), (0, 2)):
+        differ = CoberturaDiff(cobertura1, cobertura2, cache_lines=cache_lines)
+        with mock.patch(
+            'pycobertura.cobertura.reconcile_lines', side_effect=reconcile_lines
+        ) as mock_reconcile:
+            for filename in differ.files():
+                differ.diff_missed_lines(filename)
+                differ.file_source_hunks(filename)
+            if cache_lines is None:
+                differ.has_all_changes_covered()
+
+        changed_files = [
+            f for f in cobertura2.files() if not differ.is_unchanged(f)
+        ]
+        assert mock_reconcile.call_count == calls_per_file * len(changed_files)
+
+
+def test_diff__has_all_changes_covered__stops_at_first_violation():
+    import mock
+    from pycobertura.cobertura import CoberturaDiff, has_uncovered_changes
+
+    cobertura1 = make_cobertura('tests/dummy.source1/coverage.xml')
+    cobertura2 = make_cobertura('tests/dummy.source2/coverage.xml')
+    differ = CoberturaDiff(cobertura1, cobertura2)
+
+    # files with more misses first, files only in the first report left out
+    assert differ._gate_order() == [
+        'dummy/dummy3.py',
+        'dummy/dummy2.py',
+        'dummy/dummy.py',
+        'dummy/__init__.py',
+    ]
+
+    with mock.patch(
+        'pycobertura.cobertura.has_uncovered_changes',
+        side_effect=has_uncovered_changes,
+    ) as mock_has_uncovered_changes:
+        assert differ.has_all_changes_covered() is False
+    assert mock_has_uncovered_changes.call_count == 1
+
+
+def test_has_uncovered_changes__comment_only_edit():
+    from pycobertura.cobertura import has_uncovered_changes
+
+    lines1 = ['a = 1\n', '\n', '# a\n', '\n', '\n', '\n', '# b\n']
+    line_statuses = {1: 'hit'}
+
+    # the covered edit of line 1 leaves the edit of line 7 out of its hunk
+    lines2 = ['a = 2\n', '\n', '# a\n', '\n', '\n', '\n', '# c\n']
+    assert has_uncovered_changes(
+        lines1, line_statuses, lines2, line_statuses, False
+    ) is False
+
+    # but not the edit of line 3
+    lines2 = ['a = 2\n', '\n', '# c\n', '\n', '\n', '\n', '# b\n']
+    assert has_uncovered_changes(
+        lines1, line_statuses, lines2, line_statuses, False
+    ) is True
+
+
+def test_diff__has_better_coverage__uses_miss_counters():
+    import mock
+    from pycobertura.cobertura import Cobertura, CoberturaDiff
+
+    cobertura1 = Cobertura('tests/dummy.zeroexit2/coverage.xml')
+    cobertura2 = Cobertura('tests/dummy.zeroexit1/coverage.xml')
+    differ = CoberturaDiff(cobertura1, cobertura2)
+
+    with mock.patch.object(Cobertura, 'missed_statements') as mock_missed:
+        assert differ.has_better_coverage() is False
+    mock_missed.assert_not_called()
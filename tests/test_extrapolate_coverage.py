@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_extrapolate_coverage():
     from pycobertura.utils import extrapolate_coverage
     lines_w_status = [
@@ -18,3 +21,34 @@ def test_extrapolate_coverage():
         (8, "miss"),
         (9, "miss"),
     ]
+
+
+
+def test_extrapolate_missed_lines__numpy_matches_python(monkeypatch):
+    import random
+    from array import array
+    import pycobertura.utils as utils
+
+    numpy = pytest.importorskip("numpy")
+    rng = random.Random(0)
+    for _ in range(300):
+        numbers, statuses = array("I"), array("B")
+        lineno = 0
+        for _ in range(rng.randrange(0, 60)):
+            lineno = max(lineno + rng.choice((-1, 0, 1, 1, 1, 2, 5)), 1)
+            numbers.append(lineno)
+            statuses.append(rng.randrange(len(utils.LINE_STATUSES)))
+
+        monkeypatch.setattr(utils, "np", None)
+        expected = (
+            utils.extrapolate_missed_lines(numbers, statuses),
+            utils.extrapolate_missed_ranges(numbers, statuses),
+        )
+        assert expected[1] == utils.rangify_by_status(expected[0])
+
+        monkeypatch.setattr(utils, "np", numpy)
+        monkeypatch.setattr(utils, "NUMPY_MIN_LINES", 0)
+        assert (
+            utils.extrapolate_missed_lines(numbers, statuses),
+            utils.extrapolate_missed_ranges(numbers, statuses),
+        ) == expected
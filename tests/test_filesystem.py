@@ -57,6 +57,50 @@ def test_filesystem_directory__with_source_prefix():
             assert hasattr(f, 'read')
 
 
+@pytest.mark.parametrize("content, expected", [
+    (b"", []),
+    (b"a\n", ["a\n"]),
+    (b"a\r\nb", ["a\r\n", "b"]),
+    ("\u00e9\n\nc\n".encode("utf-8"), ["\u00e9\n", "\n", "c\n"]),
+])
+def test_source_lines(content, expected):
+    import pickle
+    from pycobertura.filesystem import SourceLines
+
+    lines = SourceLines(content)
+    assert len(lines) == len(expected)
+    assert list(lines) == expected
+    assert lines == expected
+    assert [lines[i] for i in range(-len(expected), len(expected))] == expected * 2
+    assert lines[1:] == expected[1:]
+    assert pickle.loads(pickle.dumps(lines)) == expected
+    with pytest.raises(IndexError):
+        lines[len(expected)]
+
+
+def test_filesystem_directory__read_lines(tmp_path):
+    import mmap
+    from pycobertura.filesystem import DirectoryFileSystem
+
+    (tmp_path / 'small.py').write_bytes(b'a = 1\nb = 2\n')
+    (tmp_path / 'large.py').write_bytes(b'x = 0\n' * 1000)
+    fs = DirectoryFileSystem(str(tmp_path))
+
+    with patch('pycobertura.filesystem.MMAP_MIN_SIZE', 1000):
+        small = fs.read_lines('small.py')
+        large = fs.read_lines('large.py')
+
+    assert isinstance(small.data, bytes)
+    assert small == ['a = 1\n', 'b = 2\n']
+    assert isinstance(large.data, mmap.mmap)
+    assert len(large) == 1000 and large[-1] == 'x = 0\n'
+    with pytest.raises(DirectoryFileSystem.FileNotFound):
+        fs.read_lines('missing.py')
+
+    with patch('pycobertura.filesystem.MMAP_MIN_SIZE', None):
+        assert isinstance(fs.read_lines('large.py').data, bytes)
+
+
 def test_filesystem_zip__file_not_found():
     from pycobertura.filesystem import ZipFileSystem
 
@@ -125,19 +169,22 @@ def test_filesystem_git():
     repo_root = "/tmp/repo"
 
     with patch.object(fsm, "subprocess") as subprocess_mock:
-        # Mock for _get_root_path
-        subprocess_mock.check_output.return_value = repo_root.encode('utf-8')
+        # Mock for _get_root_path and _index_tree
+        subprocess_mock.check_output.side_effect = [
+            repo_root.encode('utf-8'),
+            f"100644 blob some_hash\t{folder}/{filename}\0".encode(),
+        ]
 
         # Mock for open
         mock_process = MagicMock()
-        mock_process.communicate.return_value = ('some_hash blob 12\n<file-content>'.encode(), b'')
-        mock_process.wait.return_value = 0
+        mock_process.stdout.readline.return_value = b'some_hash blob 14\n'
+        mock_process.stdout.read.return_value = b'<file-content>\n'
         subprocess_mock.Popen.return_value = mock_process
 
         fs = fsm.GitFileSystem(folder, branch)
 
         with fs.open(filename) as f:
-            assert hasattr(f, 'read')
+            assert f.read() == '<file-content>'
 
         expected_git_filename = f"{branch}:{folder}/{filename}"
         git_filename = fs.real_filename(filename)
@@ -145,7 +192,36 @@ def test_filesystem_git():
 
         expected_command = ["git", "cat-file", "--batch", "--follow-symlinks"]
         subprocess_mock.Popen.assert_called_with(expected_command, cwd=repo_root, stdin=subprocess_mock.PIPE,
-                                                 stdout=subprocess_mock.PIPE, stderr=subprocess_mock.PIPE)
+                                                 stdout=subprocess_mock.PIPE, stderr=subprocess_mock.DEVNULL)
+        # the file is read by its blob SHA found in the tree index
+        mock_process.stdin.write.assert_called_with(b"some_hash\n")
+        assert fs.blob_id(filename) == "some_hash"
+
+
+def test_filesystem_git__reuses_cat_file_process():
+    import pycobertura.filesystem as fsm
+
+    with patch.object(fsm, "subprocess") as subprocess_mock:
+        subprocess_mock.check_output.side_effect = [
+            b"/tmp/repo",
+            b"100644 blob sha1\tfile1\x00100644 blob sha2\tfile2\x00100644 blob sha3\tfile3\x00",
+        ]
+
+        mock_process = MagicMock()
+        mock_process.stdout.readline.return_value = b'some_hash blob 14\n'
+        mock_process.stdout.read.return_value = b'<file-content>\n'
+        subprocess_mock.Popen.return_value = mock_process
+
+        fs = fsm.GitFileSystem("/tmp/repo", "master")
+        for filename in ("file1", "file2", "file3"):
+            with fs.open(filename) as f:
+                assert f.read() == '<file-content>'
+
+        subprocess_mock.Popen.assert_called_once()
+        assert mock_process.stdin.write.call_count == 3
+
+        fs.close()
+        mock_process.stdin.close.assert_called_once_with()
 
 
 def test_filesystem_git_integration():
@@ -238,3 +314,27 @@ def test_filesystem_factory():
 
     fs = filesystem_factory(source=".", ref=FIRST_PYCOBERTURA_COMMIT_SHA)
     assert isinstance(fs, GitFileSystem)
+
+
+def test_filesystem_git__has_file_uses_tree_index():
+    import pycobertura.filesystem as fsm
+
+    with patch.object(fsm, "subprocess") as subprocess_mock:
+        subprocess_mock.check_output.side_effect = [
+            b"/tmp/repo",
+            b"100644 blob sha1\tdummy/dummy.py\0"
+            b"120000 blob sha2\tdummy/link.py\0"
+            b"160000 commit sha3\tvendor/lib\0",
+        ]
+
+        fs = fsm.GitFileSystem("/tmp/repo", "master")
+
+        assert fs.has_file("dummy/dummy.py")
+        assert not fs.has_file("dummy/missing.py")
+        subprocess_mock.Popen.assert_not_called()
+        assert fs._submodules == {"vendor/lib": "sha3"}
+
+        # symbolic links are resolved by git
+        assert fs.blob_id("dummy/link.py") is None
+        fs.has_file("dummy/link.py")
+        subprocess_mock.Popen.assert_called_once()
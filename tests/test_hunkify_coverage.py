@@ -221,3 +221,62 @@ def test_hunkify_coverage__no_valid_hunks_found():
     hunks = hunkify_lines(lines)
 
     assert hunks == []
+
+
+def test_hunkify_coverage__file_source_matches_lines():
+    import random
+    from pycobertura.utils import hunkify_lines
+    from pycobertura.cobertura import FileSource
+
+    rng = random.Random(0)
+    for _ in range(200):
+        size = rng.randrange(0, 30)
+        statuses = {
+            lineno: 'hit' for lineno in range(1, size + 1) if rng.random() < 0.2
+        }
+        file_source = FileSource.from_line_statuses(
+            [f'{n}\n' for n in range(size)], statuses.items()
+        )
+
+        assert hunkify_lines(file_source) == hunkify_lines(list(file_source))
+
+
+def test_hunkify_coverage__file_source_builds_hunk_lines_only():
+    from pycobertura.utils import hunkify_lines
+    from pycobertura.cobertura import FileSource
+
+    accessed = []
+
+    class Source(list):
+        def __getitem__(self, index):
+            accessed.append(index)
+            return super().__getitem__(index)
+
+    file_source = FileSource.from_line_statuses(
+        Source(['x\n'] * 1000), [(500, 'miss')]
+    )
+    hunks = hunkify_lines(file_source)
+
+    assert [line.number for line in hunks[0]] == list(range(497, 504))
+    assert sorted(set(accessed)) == list(range(496, 503))
+
+
+def test_file_source__columns():
+    import pickle
+    from pycobertura.cobertura import FileSource, Line
+
+    file_source = FileSource.from_line_statuses(
+        ['a\n', 'b\n', 'c\n'], [(1, 'hit'), (3, 'partial'), (4, 'miss')]
+    )
+    file_source.reasons[2] = 3  # cov-down
+
+    expected = [
+        Line(1, 'a\n', 'hit', None),
+        Line(2, 'b\n', None, None),
+        Line(3, 'c\n', 'partial', 'cov-down'),
+    ]
+    assert file_source == expected
+    assert file_source[-1] == expected[-1]
+    assert file_source.changed_lines() == [expected[0], expected[2]]
+    assert pickle.loads(pickle.dumps(file_source)) == expected
+    assert not hasattr(file_source[0], '__dict__')
@@ -3,3 +3,4 @@ def test_imports():
     from pycobertura import CoberturaDiff
     from pycobertura import TextReporter
     from pycobertura import TextReporterDelta
+    from pycobertura import load_many
@@ -0,0 +1,43 @@
+def test_lru_cache__evicts_least_recently_used_by_weight():
+    from pycobertura.utils import LRUCache
+
+    cache = LRUCache(5)
+    cache.put('a', [1, 2])
+    cache.put('b', [1, 2])
+    assert cache.get('a') == [1, 2]  # 'b' is now the least recently used
+    cache.put('c', [1, 2])
+
+    assert 'b' not in cache
+    assert 'a' in cache and 'c' in cache
+    assert cache.weight == 4
+    assert cache.evictions == 1
+
+
+def test_lru_cache__value_heavier_than_capacity_is_not_cached():
+    from pycobertura.utils import LRUCache
+
+    cache = LRUCache(2)
+    cache.put('a', [1, 2, 3])
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    assert cache.weight == 0
+
+
+def test_lru_cache__disabled():
+    from pycobertura.utils import LRUCache
+
+    cache = LRUCache(0)
+    cache.put('a', [])
+    assert cache.get('a') is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_lru_cache__unbounded():
+    from pycobertura.utils import LRUCache
+
+    cache = LRUCache(None)
+    for i in range(100):
+        cache.put(i, [i] * 100)
+    assert len(cache) == 100
+    assert cache.get(0) == [0] * 100
+    assert (cache.hits, cache.evictions) == (1, 0)
@@ -0,0 +1,81 @@
+import pytest
+
+
+def make_counter(**bounds):
+    from pycobertura.utils import memoize
+
+    class Counter:
+        def __init__(self):
+            self.calls = 0
+
+        @memoize(**bounds) if bounds else memoize
+        def double(self, value, factor=2):
+            self.calls += 1
+            return [value] * factor
+
+    return Counter
+
+
+def test_memoize__caches_per_instance():
+    Counter = make_counter()
+    counter1, counter2 = Counter(), Counter()
+
+    assert counter1.double(1) is counter1.double(1)
+    assert counter1.calls == 1
+    assert counter2.double(1) == [1, 1]
+    assert counter2.calls == 1
+    assert counter1.double.cache.hits == 1
+    assert counter1.double.cache.misses == 1
+
+
+def test_memoize__keyword_arguments_are_part_of_the_key():
+    Counter = make_counter()
+    counter = Counter()
+
+    assert counter.double(1, factor=3) == [1, 1, 1]
+    assert counter.double(1) == [1, 1]
+    assert counter.double(1, factor=3) == [1, 1, 1]
+    assert counter.calls == 2
+
+
+def test_memoize__maxsize_evicts_least_recently_used():
+    Counter = make_counter(maxsize=2)
+    counter = Counter()
+
+    counter.double(1)
+    counter.double(2)
+    counter.double(1)  # 2 is now the least recently used
+    counter.double(3)
+    assert counter.double.cache.evictions == 1
+
+    counter.double(1)
+    assert counter.calls == 3
+    counter.double(2)
+    assert counter.calls == 4
+
+
+def test_memoize__maxbytes():
+    Counter = make_counter(maxbytes=10, sizeof=len)
+    counter = Counter()
+
+    counter.double(1, factor=6)
+    counter.double(2, factor=6)
+    assert len(counter.double.cache) == 1
+    assert counter.double.cache.weight == 6
+    assert counter.double.cache.evictions == 1
+
+
+def test_memoize__not_cached_when_invoked_on_class():
+    Counter = make_counter()
+    counter = Counter()
+
+    Counter.double(counter, 1)
+    Counter.double(counter, 1)
+    assert counter.calls == 2
+
+
+def test_memoize__maxsize_and_maxbytes():
+    from pycobertura.utils import memoize
+
+    with pytest.raises(ValueError):
+        memoize(maxsize=1, maxbytes=1)
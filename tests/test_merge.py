@@ -0,0 +1,138 @@
+import io
+
+from pycobertura.cobertura import Cobertura
+
+
+def make_report(lines, filename='dummy/dummy.py', timestamp='1'):
+    return io.StringIO(
+        f'<?xml version="1.0" ?><coverage timestamp="{timestamp}" version="1">'
+        '<sources><source>/src</source></sources><packages><package name="dummy">'
+        f'<classes><class name="dummy" filename="{filename}"><methods/><lines>'
+        f'{lines}</lines></class></classes></package></packages></coverage>'
+    )
+
+
+def merge(*reports):
+    output = io.BytesIO()
+    Cobertura.merge(reports, output)
+    return output.getvalue()
+
+
+def test_merge__sums_hits():
+    merged = Cobertura(merge(
+        'tests/dummy.original.xml',
+        'tests/dummy.original-full-cov.xml',
+    ))
+    assert merged.files() == ['dummy/__init__.py', 'dummy/dummy.py']
+    assert merged.total_misses() == 0
+    assert merged.line_rate() == 1.0
+    assert merged.line_statuses('dummy/dummy.py') == [
+        (1, 'hit'), (2, 'hit'), (4, 'hit'), (5, 'hit'),
+    ]
+
+
+def test_merge__single_report_is_unchanged():
+    report = Cobertura('tests/cobertura.xml')
+    merged = Cobertura(merge('tests/cobertura.xml'))
+
+    assert merged.files() == report.files()
+    for filename in report.files():
+        assert merged.line_statuses(filename) == report.line_statuses(filename)
+    assert merged.branch_rate() == report.branch_rate()
+
+
+def test_merge__without_branches_has_branch_rate_of_zero():
+    merged = merge('tests/dummy.source1/coverage.xml')
+    assert Cobertura(merged).branch_rate() == 0.0
+    assert b'branch-rate="1"' not in merged
+
+
+def test_merge__union_of_files_and_sources():
+    merged = merge(
+        make_report('<line number="1" hits="1"/>', filename='a.py', timestamp='2'),
+        make_report('<line number="1" hits="0"/>', filename='b.py', timestamp='5'),
+    )
+    cobertura = Cobertura(merged)
+    assert cobertura.files() == ['a.py', 'b.py']
+    assert cobertura.missed_statements('b.py') == [1]
+    assert b'timestamp="5"' in merged
+    assert merged.count(b'<source>/src</source>') == 1
+
+
+def test_merge__intersects_missing_branches():
+    merged = merge(
+        make_report(
+            '<line number="1" hits="1" branch="true" '
+            'condition-coverage="50% (2/4)" missing-branches="2,3"/>'
+        ),
+        make_report(
+            '<line number="1" hits="1" branch="true" '
+            'condition-coverage="50% (2/4)" missing-branches="3,4"/>'
+        ),
+    )
+    assert (
+        b'<line number="1" hits="2" branch="true" '
+        b'condition-coverage="75% (3/4)" missing-branches="3"/>'
+    ) in merged
+    assert Cobertura(merged).line_statuses('dummy/dummy.py') == [(1, 'partial')]
+
+
+def test_merge__best_condition_coverage_without_missing_branches():
+    merged = merge(
+        make_report(
+            '<line number="1" hits="1" branch="true" condition-coverage="25% (1/4)"/>'
+        ),
+        make_report(
+            '<line number="1" hits="0" branch="true" condition-coverage="0% (0/4)"/>'
+        ),
+        make_report(
+            '<line number="1" hits="1" branch="true" condition-coverage="50% (2/4)"/>'
+        ),
+    )
+    assert (
+        b'<line number="1" hits="2" branch="true" condition-coverage="50% (2/4)"/>'
+    ) in merged
+
+
+def test_merge__fully_covered_branch():
+    merged = merge(
+        make_report(
+            '<line number="1" hits="1" branch="true" '
+            'condition-coverage="50% (1/2)" missing-branches="exit"/>'
+        ),
+        make_report(
+            '<line number="1" hits="1" branch="true" condition-coverage="100% (2/2)"/>'
+        ),
+    )
+    assert (
+        b'<line number="1" hits="2" branch="true" condition-coverage="100% (2/2)"/>'
+    ) in merged
+
+
+def test_merge__compressed_reports(tmp_path):
+    import gzip
+
+    path = tmp_path / 'coverage.xml.gz'
+    with open('tests/dummy.original-full-cov.xml', 'rb') as f:
+        path.write_bytes(gzip.compress(f.read()))
+
+    merged = Cobertura(merge('tests/dummy.original.xml', str(path)))
+    assert merged.total_misses() == 0
+
+
+def test_merge__branch_without_condition_coverage_is_unknown():
+    merged = merge(
+        make_report('<line number="1" hits="1" branch="true"/>'),
+        make_report(
+            '<line number="1" hits="1" branch="true" '
+            'condition-coverage="50% (1/2)" missing-branches="exit"/>'
+        ),
+    )
+    assert (
+        b'<line number="1" hits="2" branch="true" '
+        b'condition-coverage="50% (1/2)" missing-branches="exit"/>'
+    ) in merged
+    assert Cobertura(merged).line_statuses('dummy/dummy.py') == [(1, 'partial')]
+
+    merged = merge(make_report('<line number="1" hits="0" branch="true"/>'))
+    assert b'<line number="1" hits="0" branch="true"/>' in merged
@@ -51,3 +51,58 @@ def test_reconcile_lines__more_to_less():
     ]
 
     assert reconcile_lines(lines1, lines2) == {2: 1, 4: 2}
+
+
+def test_reconcile_lines__repeated_and_moved_lines():
+    from pycobertura.utils import reconcile_lines
+
+    lines1 = [
+        'def a():',   # 1
+        '    pass',   # 2
+        'def b():',   # 3
+        '    pass',   # 4
+        'def c():',   # 5
+        '    pass',   # 6
+    ]
+
+    lines2 = [
+        'def c():',   # 1
+        '    pass',   # 2
+        'def a():',   # 3
+        '    pass',   # 4
+        'def b():',   # 5
+        '    pass',   # 6
+    ]
+
+    mapping = reconcile_lines(lines1, lines2)
+    assert len(mapping) == 4
+    assert mapping[1] == 3 and mapping[3] == 5
+    assert all(lines1[i - 1] == lines2[j - 1] for i, j in mapping.items())
+
+
+def test_reconcile_lines__no_unique_lines():
+    from pycobertura.utils import reconcile_lines
+
+    lines1 = ['a', 'b', 'c', 'a', 'b', 'c', 'a', 'b']
+    lines2 = ['c', 'b', 'a', 'c', 'b', 'a', 'c', 'b']
+
+    # the longest common subsequences have 5 lines
+    mapping = reconcile_lines(lines1, lines2)
+    assert len(mapping) == 5
+    assert sorted(mapping.values()) == list(mapping.values())
+    assert all(lines1[i - 1] == lines2[j - 1] for i, j in mapping.items())
+
+
+def test_reconcile_lines__no_unique_lines__max_cost():
+    import mock
+    from pycobertura.utils import reconcile_lines
+
+    lines1 = ['a', 'b', 'c', 'a', 'b', 'c', 'a', 'b']
+    lines2 = ['c', 'b', 'a', 'c', 'b', 'a', 'c', 'b']
+
+    # past the maximum cost, the lines matched are fewer but still in order
+    with mock.patch('pycobertura.utils.MYERS_MAX_COST', 1):
+        mapping = reconcile_lines(lines1, lines2)
+    assert 0 < len(mapping) < 5
+    assert sorted(mapping.values()) == list(mapping.values())
+    assert all(lines1[i - 1] == lines2[j - 1] for i, j in mapping.items())
@@ -15,3 +15,30 @@ def test_get_filenames_that_do_not_match_regex_given_list_of_filenames():
     result = get_filenames_that_do_not_match_regex(filenames, regex_param)
     assert result == ["tests/test_cli.py"]
 
+
+def test_compile_ignore_filter__globs_match_as_fnmatch():
+    import fnmatch
+    from pycobertura.utils import compile_ignore_filter
+    filenames = ["tests/dummy/test_dummy.py", "tests/cobertura.xml", "tests/test_cli.py", "a/__pycache__", "dummy.py"]
+    patterns = get_non_empty_non_commented_lines_from_file_in_ascii('tests/.testgitignore', '#')
+    ignored = {fname for igp in patterns for fname in fnmatch.filter(filenames, igp)}
+    ignore_filter = compile_ignore_filter('tests/.testgitignore')
+    assert ignore_filter(filenames) == [fname for fname in filenames if fname not in ignored]
+    assert compile_ignore_filter(ignore_filter) is ignore_filter
+
+def test_compile_ignore_filter__ignore_file_cached_by_mtime(tmp_path):
+    import os
+    from pycobertura.utils import compile_ignore_filter
+    ignore_file = tmp_path / '.ignore'
+    ignore_file.write_text('# nothing\n')
+    ignore_filter = compile_ignore_filter(str(ignore_file))
+    assert ignore_filter(["a.py", "b.xml"]) == ["a.py", "b.xml"]
+    assert compile_ignore_filter(str(ignore_file)) is ignore_filter
+
+    ignore_file.write_text('*.xml\n')
+    os.utime(ignore_file, ns=(0, 0))
+    assert compile_ignore_filter(str(ignore_file))(["a.py", "b.xml"]) == ["a.py"]
+
+def test_compile_ignore_filter__regex_reused():
+    from pycobertura.utils import compile_ignore_filter
+    assert compile_ignore_filter("^tests/dummy") is compile_ignore_filter("^tests/dummy")
@@ -345,6 +345,37 @@ def test_html_report(report, source, expected_output):
 
     assert remove_style_tag(html_output) == expected_output
 
+def test_html_report__static_css_as_included():
+    from jinja2 import Environment, PackageLoader
+    from pycobertura.reporters import get_static_css
+
+    env = Environment(loader=PackageLoader("pycobertura", "templates"))
+    included = env.from_string("{% include 'normalize.css' %}\n{% include 'skeleton.css' %}")
+    assert get_static_css() == included.render()
+
+def test_html_report__templates_bytecode_cache(tmp_path, monkeypatch):
+    from pycobertura.reporters import HtmlReporter, get_template_env
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    html_output = HtmlReporter(make_cobertura()).generate()
+    cache_files = list((tmp_path / "pycobertura" / "templates").iterdir())
+    assert len(cache_files) == 2  # html.jinja2 and macro.source.jinja2
+
+    get_template_env.cache_clear()
+    assert HtmlReporter(make_cobertura()).generate() == html_output
+
+def test_html_report__templates_cache_dir_not_writable(tmp_path, monkeypatch):
+    from pycobertura.reporters import HtmlReporter, get_template_cache_dir, get_template_env
+
+    not_a_dir = tmp_path / "cache"
+    not_a_dir.write_text("")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(not_a_dir))
+    monkeypatch.setenv("LOCALAPPDATA", str(not_a_dir))
+    assert get_template_cache_dir() is None
+    assert get_template_env().bytecode_cache is None
+    assert "Skeleton V2.0" in HtmlReporter(make_cobertura()).generate()
+
 def test_html_report__dont_render_ignore_regex():
     from pycobertura.reporters import HtmlReporter
 